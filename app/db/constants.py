@@ -1,2 +1,13 @@
+import os
+
 RETRIES = 5
 DELAY = 3
+WRITE_BATCH_SIZE = 50
+WRITE_FLUSH_INTERVAL = 5
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+POOL_MAX_INACTIVE_LIFETIME = 300
+POOL_CLOSE_TIMEOUT = 10
+POOL_HEALTH_CHECK_INTERVAL = 60
+MIGRATION_BATCH_SIZE = 500
+DICT_TRAINING_SAMPLES = 2000
@@ -1,28 +1,94 @@
 import asyncio
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Set, Tuple
 
 import asyncpg
 
-from .constants import DELAY, RETRIES
+from ..utils.compression import compress, decompress
+from .constants import (DELAY, POOL_CLOSE_TIMEOUT,
+                        POOL_MAX_INACTIVE_LIFETIME, POOL_MAX_SIZE,
+                        POOL_MIN_SIZE, RETRIES, WRITE_BATCH_SIZE,
+                        WRITE_FLUSH_INTERVAL)
 
 DB_URL = os.getenv("DATABASE_URL")
 
+_pool: asyncpg.Pool | None = None
 
-async def get_conn():
+
+async def init_pool() -> asyncpg.Pool:
+    """Создаёт общий для процесса пул соединений (однократно)."""
+    global _pool
+    if _pool is not None:
+        return _pool
     for i in range(RETRIES):
         try:
-            return await asyncpg.connect(DB_URL)
+            _pool = await asyncpg.create_pool(
+                DB_URL,
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=POOL_MAX_INACTIVE_LIFETIME
+            )
+            return _pool
         except Exception as e:
             if i == RETRIES - 1:
                 raise
-            logging.error(f'[DB] Failed to connect '
+            logging.error(f'[DB] Failed to create pool '
                           f'(attempt {i+1}/{RETRIES}): {e}')
             await asyncio.sleep(DELAY)
 
 
+def get_pool() -> asyncpg.Pool:
+    if _pool is None:
+        raise RuntimeError('Пул соединений не инициализирован')
+    return _pool
+
+
+async def check_pool() -> bool:
+    """Проверка живости пула: простой запрос через свободное соединение."""
+    try:
+        return await get_pool().fetchval('SELECT 1') == 1
+    except Exception as e:
+        logging.error(f'[DB] Pool health check failed: {e}')
+        return False
+
+
+async def close_pool():
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    try:
+        await asyncio.wait_for(pool.close(), timeout=POOL_CLOSE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logging.warning('[DB] Pool did not close in time, terminating')
+        pool.terminate()
+
+
+@asynccontextmanager
+async def transaction(conn):
+    """
+    Транзакция на одном соединении: из пула берётся свободное,
+    отдельное соединение используется как есть.
+    """
+    if isinstance(conn, asyncpg.Pool):
+        async with conn.acquire() as connection:
+            async with connection.transaction():
+                yield connection
+    else:
+        async with conn.transaction():
+            yield conn
+
+
 async def init_db():
-    conn = await get_conn()
+    pool = await init_pool()
+    async with pool.acquire() as conn:
+        await create_tables(conn)
+
+
+async def create_tables(conn):
     await conn.execute("""
     CREATE TABLE IF NOT EXISTS documents (
         id SERIAL PRIMARY KEY,
@@ -33,17 +99,259 @@ async def init_db():
     await conn.execute("""
         CREATE INDEX IF NOT EXISTS idx_documents_url ON documents (url);
     """)
-    await conn.close()
+    await conn.execute("""
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_blob BYTEA;
+    """)
+    await conn.execute("""
+        ALTER TABLE documents
+            ADD COLUMN IF NOT EXISTS etag TEXT,
+            ADD COLUMN IF NOT EXISTS last_modified TEXT,
+            ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMPTZ DEFAULT now();
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS missing_documents (
+        url TEXT PRIMARY KEY,
+        status INTEGER,
+        checked_at TIMESTAMPTZ DEFAULT now()
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS sitting_years (
+        year INTEGER PRIMARY KEY,
+        loaded_at TIMESTAMPTZ DEFAULT now()
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS sitting_dates (
+        year INTEGER,
+        month TEXT,
+        day INTEGER,
+        PRIMARY KEY (year, month, day)
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS extracted_pages (
+        url TEXT PRIMARY KEY,
+        kind TEXT,
+        text TEXT,
+        extractor_version INTEGER,
+        extracted_at TIMESTAMPTZ DEFAULT now()
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS sitting_sections (
+        day_url TEXT,
+        position INTEGER,
+        year INTEGER,
+        month TEXT,
+        day INTEGER,
+        house TEXT,
+        title TEXT,
+        href TEXT,
+        PRIMARY KEY (day_url, position)
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS contributions (
+        section_url TEXT,
+        position INTEGER,
+        speaker TEXT,
+        text TEXT,
+        PRIMARY KEY (section_url, position)
+    );
+    """)
+    await create_text_index(conn)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+        name TEXT PRIMARY KEY,
+        position TEXT,
+        updated_at TIMESTAMPTZ DEFAULT now()
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS query_results (
+        fingerprint TEXT,
+        year INTEGER,
+        extractor_version INTEGER NOT NULL,
+        matches JSONB NOT NULL,
+        computed_at TIMESTAMPTZ DEFAULT now(),
+        PRIMARY KEY (fingerprint, year)
+    );
+    """)
+    await create_mp_directory(conn)
+    await create_mp_profiles(conn)
+
+
+async def create_mp_profiles(conn):
+    """
+    Профили персон: годы активности и по каждому году список
+    выступлений (дата, заголовок, ссылка). Отметка в mp_profile_years
+    означает, что год загружен, даже если выступлений в нём нет.
+    """
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS mp_profiles (
+        slug TEXT PRIMARY KEY,
+        years INTEGER[] NOT NULL,
+        loaded_at TIMESTAMPTZ DEFAULT now()
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS mp_profile_years (
+        slug TEXT,
+        year INTEGER,
+        loaded_at TIMESTAMPTZ DEFAULT now(),
+        PRIMARY KEY (slug, year)
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS mp_year_contributions (
+        slug TEXT,
+        year INTEGER,
+        position INTEGER,
+        date TEXT,
+        title TEXT,
+        href TEXT,
+        PRIMARY KEY (slug, year, position)
+    );
+    """)
+
+
+async def create_mp_directory(conn):
+    """
+    Справочник персон со страниц /people/{буква}: фамилия
+    в верхнем регистре с индексом для поиска по началу
+    и триграммным индексом для поиска с опечатками.
+    """
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS mp_directory (
+        slug TEXT PRIMARY KEY,
+        letter TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        surname TEXT NOT NULL,
+        dates TEXT
+    );
+    """)
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS mp_directory_letters (
+        letter TEXT PRIMARY KEY,
+        refreshed_at TIMESTAMPTZ DEFAULT now()
+    );
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_mp_directory_letter
+        ON mp_directory (letter);
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_mp_directory_surname
+        ON mp_directory (surname text_pattern_ops);
+    """)
+    try:
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_mp_directory_surname_trgm
+            ON mp_directory USING gin (surname gin_trgm_ops);
+        """)
+    except Exception as e:
+        logging.error(f'[DB] Не удалось создать триграммный индекс '
+                      f'справочника персон: {e}')
 
 
-async def save_document(url: str, content: str, conn):
+async def create_text_index(conn):
+    """
+    Триграммные индексы по разобранным обсуждениям и выступлениям:
+    они обслуживают и поиск подстроки (LIKE), и поиск слова целиком
+    (регулярное выражение со \\m...\\M).
+    """
     try:
-        await conn.execute(
-            ("INSERT INTO documents (url, content) VALUES ($1, $2) "
-             "ON CONFLICT (url) DO NOTHING"),
-            url,
-            content
-            )
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    except Exception as e:
+        logging.error(f'[DB] Не удалось подключить pg_trgm: {e}')
+    # tsvector-столбцы ни одним запросом не читались: удаляем их
+    # вместе с индексами там, где они уже были созданы.
+    await conn.execute("""
+        ALTER TABLE extracted_pages DROP COLUMN IF EXISTS text_tsv;
+    """)
+    await conn.execute("""
+        ALTER TABLE contributions DROP COLUMN IF EXISTS text_tsv;
+    """)
+    await create_speaker_index(conn)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sitting_sections_year
+        ON sitting_sections (year, house);
+    """)
+    try:
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_extracted_pages_trgm
+            ON extracted_pages USING gin (upper(text) gin_trgm_ops)
+            WHERE kind = 'section';
+        """)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contributions_trgm
+            ON contributions USING gin (upper(text) gin_trgm_ops);
+        """)
+    except Exception as e:
+        logging.error(f'[DB] Не удалось создать триграммные индексы: {e}')
+    await conn.execute("""
+    CREATE TABLE IF NOT EXISTS text_index_coverage (
+        year INTEGER,
+        kind TEXT,
+        extractor_version INTEGER,
+        indexed_at TIMESTAMPTZ DEFAULT now(),
+        PRIMARY KEY (year, kind)
+    );
+    """)
+
+
+async def create_speaker_index(conn):
+    """
+    Индекс выступлений по персоне и году: slug берётся из ссылки
+    cite, год — из url обсуждения. Столбцы вычисляемые, поэтому
+    уже сохранённые выступления попадают в индекс без дообхода.
+    """
+    await conn.execute(r"""
+        ALTER TABLE contributions
+            ADD COLUMN IF NOT EXISTS speaker_slug TEXT
+            GENERATED ALWAYS AS (
+                substring(speaker from '/people/([^/#?]+)')
+            ) STORED,
+            ADD COLUMN IF NOT EXISTS sitting_year INTEGER
+            GENERATED ALWAYS AS (
+                substring(section_url from '/(\d{4})/[a-z]{3}/\d{1,2}/')::int
+            ) STORED;
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_contributions_speaker
+        ON contributions (speaker_slug, sitting_year);
+    """)
+
+
+def document_content(row) -> str:
+    """Старые строки хранят текст в content, новые — сжатым в content_blob."""
+    if row['content_blob'] is not None:
+        return decompress(row['content_blob'])
+    return row['content']
+
+
+SAVE_DOCUMENT_QUERY = (
+    "INSERT INTO documents (url, content_blob, etag, last_modified) "
+    "VALUES ($1, $2, $3, $4) "
+    "ON CONFLICT (url) DO UPDATE SET content = NULL, "
+    "content_blob = EXCLUDED.content_blob, etag = EXCLUDED.etag, "
+    "last_modified = EXCLUDED.last_modified, fetched_at = now()"
+)
+
+
+async def save_document(url: str,
+                        content: str,
+                        conn,
+                        etag: str | None = None,
+                        last_modified: str | None = None):
+    """Сохраняет или обновляет документ вместе с валидаторами HTTP."""
+    try:
+        await conn.execute(SAVE_DOCUMENT_QUERY,
+                           url,
+                           compress(content),
+                           etag,
+                           last_modified)
     except Exception as e:
         logging.error(f'Ошибка при сохранении документа {url}: {e}')
 
@@ -51,13 +359,787 @@ async def save_document(url: str, content: str, conn):
 async def get_document(url: str, conn):
     try:
         row = await conn.fetchrow(
-            "SELECT content FROM documents WHERE url = $1",
+            "SELECT content, content_blob FROM documents WHERE url = $1",
             url
         )
         if row is not None:
-            return row['content']
+            return document_content(row)
         else:
             return False
     except Exception as e:
         logging.error(f'Ошибка при получении документа {url}: {e}')
         return False
+
+
+async def save_documents(rows: List[Tuple[str, str, str | None, str | None]],
+                         conn):
+    """Сохраняет пачку (url, текст, ETag, Last-Modified)."""
+    if not rows:
+        return
+    try:
+        await conn.executemany(
+            SAVE_DOCUMENT_QUERY,
+            [(url, compress(content), etag, last_modified)
+             for url, content, etag, last_modified in rows]
+            )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении {len(rows)} документов: {e}')
+
+
+async def get_documents(urls: List[str], conn) -> Dict[str, str]:
+    """Получает документы по списку url одним запросом."""
+    if not urls:
+        return {}
+    try:
+        rows = await conn.fetch(
+            ("SELECT url, content, content_blob FROM documents "
+             "WHERE url = ANY($1::text[])"),
+            urls
+        )
+        return {row['url']: document_content(row) for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при получении {len(urls)} документов: {e}')
+        return {}
+
+
+async def get_stale_documents(urls: List[str],
+                              max_age_days: int,
+                              conn) -> Dict[str, Tuple[str | None, str | None]]:
+    """
+    Документы из списка, загруженные раньше max_age_days дней назад:
+    {url: (ETag, Last-Modified)} для условного запроса.
+    """
+    if not urls:
+        return {}
+    try:
+        rows = await conn.fetch(
+            ("SELECT url, etag, last_modified FROM documents "
+             "WHERE url = ANY($1::text[]) "
+             "AND fetched_at < now() - make_interval(days => $2)"),
+            urls,
+            max_age_days
+        )
+        return {row['url']: (row['etag'], row['last_modified'])
+                for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при проверке свежести документов: {e}')
+        return {}
+
+
+async def touch_documents(urls: List[str], conn):
+    """Отмечает документы как проверенные (ответ 304 Not Modified)."""
+    if not urls:
+        return
+    try:
+        await conn.execute(
+            ("UPDATE documents SET fetched_at = now() "
+             "WHERE url = ANY($1::text[])"),
+            urls
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при обновлении проверки документов: {e}')
+
+
+class DocumentWriter:
+    """
+    Буфер отложенной записи документов.
+    Сбрасывает накопленное пачкой при достижении размера
+    или по прошествии интервала с последней записи.
+    """
+
+    def __init__(self,
+                 conn,
+                 batch_size: int = WRITE_BATCH_SIZE,
+                 flush_interval: float = WRITE_FLUSH_INTERVAL):
+        self._conn = conn
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._rows: List[Tuple[str, str, str | None, str | None]] = []
+        self._last_flush = time.monotonic()
+
+    async def add(self,
+                  url: str,
+                  content: str,
+                  etag: str | None = None,
+                  last_modified: str | None = None):
+        self._rows.append((url, content, etag, last_modified))
+        if (len(self._rows) >= self._batch_size or
+                time.monotonic() - self._last_flush >= self._flush_interval):
+            await self.flush()
+
+    async def flush(self):
+        rows, self._rows = self._rows, []
+        self._last_flush = time.monotonic()
+        await save_documents(rows, self._conn)
+
+    async def close(self):
+        await self.flush()
+
+
+async def is_document_missing(url: str, max_age_days: int, conn) -> bool:
+    try:
+        row = await conn.fetchrow(
+            ("SELECT 1 FROM missing_documents WHERE url = $1 "
+             "AND checked_at > now() - make_interval(days => $2)"),
+            url,
+            max_age_days
+        )
+        return row is not None
+    except Exception as e:
+        logging.error(f'Ошибка при проверке отсутствия {url}: {e}')
+        return False
+
+
+async def save_missing_document(url: str, status: int, conn):
+    try:
+        await conn.execute(
+            ("INSERT INTO missing_documents (url, status) VALUES ($1, $2) "
+             "ON CONFLICT (url) DO UPDATE "
+             "SET status = EXCLUDED.status, checked_at = now()"),
+            url,
+            status
+            )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении отсутствия {url}: {e}')
+
+
+async def get_missing_documents(urls: List[str],
+                                max_age_days: int,
+                                conn) -> Set[str]:
+    if not urls:
+        return set()
+    try:
+        rows = await conn.fetch(
+            ("SELECT url FROM missing_documents "
+             "WHERE url = ANY($1::text[]) "
+             "AND checked_at > now() - make_interval(days => $2)"),
+            urls,
+            max_age_days
+        )
+        return {row['url'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при проверке отсутствия документов: {e}')
+        return set()
+
+
+async def get_sitting_dates(year: int, conn):
+    """
+    Возвращает список (месяц, день) заседаний за год
+    или None, если календарь года ещё не загружался.
+    """
+    try:
+        loaded = await conn.fetchval(
+            "SELECT 1 FROM sitting_years WHERE year = $1",
+            year
+        )
+        if loaded is None:
+            return None
+        rows = await conn.fetch(
+            "SELECT month, day FROM sitting_dates WHERE year = $1",
+            year
+        )
+        return [(row['month'], row['day']) for row in rows]
+    except Exception as e:
+        logging.error(f'Ошибка при получении календаря {year}: {e}')
+        return None
+
+
+async def save_sitting_dates(year: int, dates: list, conn):
+    try:
+        await conn.executemany(
+            ("INSERT INTO sitting_dates (year, month, day) "
+             "VALUES ($1, $2, $3) ON CONFLICT DO NOTHING"),
+            [(year, month, day) for month, day in dates]
+        )
+        await conn.execute(
+            ("INSERT INTO sitting_years (year) VALUES ($1) "
+             "ON CONFLICT DO NOTHING"),
+            year
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении календаря {year}: {e}')
+
+
+async def get_extracted_urls(urls: List[str], version: int, conn) -> Set[str]:
+    """url из списка, уже разобранные текущей версией экстрактора."""
+    if not urls:
+        return set()
+    try:
+        rows = await conn.fetch(
+            ("SELECT url FROM extracted_pages "
+             "WHERE url = ANY($1::text[]) AND extractor_version = $2"),
+            urls,
+            version
+        )
+        return {row['url'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при получении разобранных страниц: {e}')
+        return set()
+
+
+async def get_day_sections(day_urls: List[str], version: int, conn):
+    """
+    Обсуждения по страницам дней: {day_url: [строки sitting_sections]}.
+    Дни, не разобранные текущей версией экстрактора, в словарь не попадают.
+    """
+    extracted = await get_extracted_urls(day_urls, version, conn)
+    if not extracted:
+        return {}
+    sections = {url: [] for url in extracted}
+    try:
+        rows = await conn.fetch(
+            ("SELECT day_url, house, title, href FROM sitting_sections "
+             "WHERE day_url = ANY($1::text[]) ORDER BY day_url, position"),
+            list(extracted)
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при получении обсуждений: {e}')
+        return {}
+    for row in rows:
+        sections[row['day_url']].append(row)
+    return sections
+
+
+async def save_day_sections(days: List[Tuple], version: int, conn) -> bool:
+    """
+    days — список (day_url, year, month, day, sections).
+    Обсуждения и отметка в extracted_pages пишутся одной транзакцией;
+    один и тот же день, разобранный двумя воркерами сразу, не вызывает
+    конфликта ключей. Возвращает False, если запись не удалась.
+    """
+    if not days:
+        return True
+    urls = [day_url for day_url, *_ in days]
+    try:
+        async with transaction(conn) as connection:
+            await connection.execute(
+                ("DELETE FROM sitting_sections "
+                 "WHERE day_url = ANY($1::text[])"),
+                urls
+            )
+            await connection.executemany(
+                ("INSERT INTO sitting_sections "
+                 "(day_url, position, year, month, day, house, title, href) "
+                 "VALUES ($1, $2, $3, $4, $5, $6, $7, $8) "
+                 "ON CONFLICT (day_url, position) DO NOTHING"),
+                [(day_url, position, year, month, day,
+                  section.house, section.title, section.href)
+                 for day_url, year, month, day, sections in days
+                 for position, section in enumerate(sections)]
+            )
+            await mark_extracted(urls,
+                                 'day',
+                                 [None] * len(urls),
+                                 version,
+                                 connection)
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении обсуждений: {e}')
+        return False
+    return True
+
+
+async def get_section_texts(urls: List[str], version: int, conn):
+    """Тексты обсуждений, разобранных текущей версией экстрактора."""
+    if not urls:
+        return {}
+    try:
+        rows = await conn.fetch(
+            ("SELECT url, text FROM extracted_pages "
+             "WHERE url = ANY($1::text[]) AND extractor_version = $2"),
+            urls,
+            version
+        )
+        return {row['url']: row['text'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при получении текстов обсуждений: {e}')
+        return {}
+
+
+async def get_contributions(section_urls: List[str], conn):
+    if not section_urls:
+        return {}
+    contributions = {url: [] for url in section_urls}
+    try:
+        rows = await conn.fetch(
+            ("SELECT section_url, speaker, text FROM contributions "
+             "WHERE section_url = ANY($1::text[]) "
+             "ORDER BY section_url, position"),
+            section_urls
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при получении выступлений: {e}')
+        return {}
+    for row in rows:
+        contributions[row['section_url']].append(row)
+    return contributions
+
+
+async def save_sections(sections: List[Tuple], version: int, conn) -> bool:
+    """
+    sections — список (section_url, text, speeches). Пишется одной
+    транзакцией, как save_day_sections. Возвращает False, если запись
+    не удалась.
+    """
+    if not sections:
+        return True
+    urls = [url for url, _, _ in sections]
+    try:
+        async with transaction(conn) as connection:
+            await connection.execute(
+                ("DELETE FROM contributions "
+                 "WHERE section_url = ANY($1::text[])"),
+                urls
+            )
+            await connection.executemany(
+                ("INSERT INTO contributions "
+                 "(section_url, position, speaker, text) "
+                 "VALUES ($1, $2, $3, $4) "
+                 "ON CONFLICT (section_url, position) DO NOTHING"),
+                [(url, position, speech.speaker, speech.text)
+                 for url, _, speeches in sections
+                 for position, speech in enumerate(speeches)]
+            )
+            await mark_extracted(urls,
+                                 'section',
+                                 [text for _, text, _ in sections],
+                                 version,
+                                 connection)
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении выступлений: {e}')
+        return False
+    return True
+
+
+async def mark_extracted(urls: List[str],
+                         kind: str,
+                         texts: List[str | None],
+                         version: int,
+                         conn):
+    await conn.executemany(
+        ("INSERT INTO extracted_pages (url, kind, text, extractor_version) "
+         "VALUES ($1, $2, $3, $4) ON CONFLICT (url) DO UPDATE "
+         "SET kind = EXCLUDED.kind, text = EXCLUDED.text, "
+         "extractor_version = EXCLUDED.extractor_version, "
+         "extracted_at = now()"),
+        [(url, kind, text, version) for url, text in zip(urls, texts)]
+    )
+
+
+async def get_indexed_years(from_year: int,
+                            to_year: int,
+                            kind: str,
+                            version: int,
+                            conn) -> Set[int]:
+    """Годы, полностью разобранные в текстовый индекс текущей версией."""
+    try:
+        rows = await conn.fetch(
+            ("SELECT year FROM text_index_coverage "
+             "WHERE year BETWEEN $1 AND $2 AND kind = $3 "
+             "AND extractor_version = $4"),
+            from_year,
+            to_year,
+            kind,
+            version
+        )
+        return {row['year'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при проверке покрытия индекса: {e}')
+        return set()
+
+
+async def mark_year_indexed(year: int, kind: str, version: int, conn):
+    try:
+        await conn.execute(
+            ("INSERT INTO text_index_coverage (year, kind, extractor_version) "
+             "VALUES ($1, $2, $3) ON CONFLICT (year, kind) DO UPDATE "
+             "SET extractor_version = EXCLUDED.extractor_version, "
+             "indexed_at = now()"),
+            year,
+            kind,
+            version
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при отметке покрытия {year}: {e}')
+
+
+def like_pattern(keyword: str) -> str:
+    """Шаблон LIKE для поиска подстроки с экранированием спецсимволов."""
+    escaped = (keyword.replace('\\', '\\\\')
+               .replace('%', '\\%')
+               .replace('_', '\\_'))
+    return f'%{escaped}%'
+
+
+def word_pattern(keyword: str) -> str:
+    """Регулярное выражение Postgres для поиска keyword целым словом."""
+    escaped = ''.join(char if char.isalnum() else f'\\{char}'
+                      for char in keyword)
+    return f'\\m{escaped}\\M'
+
+
+async def search_section_texts(keyword: str,
+                               whole_word: bool,
+                               from_year: int,
+                               to_year: int,
+                               houses: List[str],
+                               months: List[str],
+                               base_url: str,
+                               version: int,
+                               conn):
+    """
+    Обсуждения за период, в тексте которых есть подстрока keyword
+    (в верхнем регистре) или, при whole_word, слово keyword целиком,
+    в порядке дат и позиций на странице дня.
+    """
+    if whole_word:
+        condition, pattern = '~', word_pattern(keyword)
+    else:
+        condition, pattern = 'LIKE', like_pattern(keyword)
+    return await conn.fetch(
+        ("SELECT s.year, s.month, s.day, s.title, s.href "
+         "FROM sitting_sections s "
+         "JOIN extracted_pages e ON e.url = $1 || s.href "
+         "WHERE s.year BETWEEN $2 AND $3 AND s.house = ANY($4::text[]) "
+         "AND e.kind = 'section' AND e.extractor_version = $5 "
+         f"AND upper(e.text) {condition} $6 "
+         "ORDER BY s.year, array_position($7::text[], s.month), s.day, "
+         "s.position"),
+        base_url,
+        from_year,
+        to_year,
+        houses,
+        version,
+        pattern,
+        months
+    )
+
+
+async def get_checkpoint(name: str, conn) -> str | None:
+    return await conn.fetchval(
+        "SELECT position FROM crawl_checkpoints WHERE name = $1",
+        name
+    )
+
+
+async def save_checkpoint(name: str, position: str | None, conn):
+    await conn.execute(
+        ("INSERT INTO crawl_checkpoints (name, position) VALUES ($1, $2) "
+         "ON CONFLICT (name) DO UPDATE "
+         "SET position = EXCLUDED.position, updated_at = now()"),
+        name,
+        position
+    )
+
+
+async def get_coverage(from_year: int, to_year: int, base_url: str, conn):
+    """Покрытие корпуса по годам: дни заседаний, обсуждения, индекс."""
+    return await conn.fetch(
+        ("SELECT y.year, "
+         "(SELECT count(*) FROM sitting_dates d "
+         " WHERE d.year = y.year) AS sitting_days, "
+         "(SELECT count(DISTINCT s.day_url) FROM sitting_sections s "
+         " WHERE s.year = y.year) AS extracted_days, "
+         "(SELECT count(*) FROM sitting_sections s "
+         " WHERE s.year = y.year) AS sections, "
+         "(SELECT count(*) FROM sitting_sections s "
+         " JOIN extracted_pages e ON e.url = $1 || s.href "
+         " WHERE s.year = y.year) AS extracted_sections, "
+         "EXISTS (SELECT 1 FROM text_index_coverage c "
+         " WHERE c.year = y.year) AS indexed "
+         "FROM generate_series($2::int, $3::int) AS y(year) "
+         "ORDER BY y.year"),
+        base_url,
+        from_year,
+        to_year
+    )
+
+
+async def get_query_results(fingerprint: str,
+                            version: int,
+                            conn) -> Dict[int, str]:
+    """Сохранённые погодные результаты запроса: {год: JSON найденного}."""
+    try:
+        rows = await conn.fetch(
+            ("SELECT year, matches::text AS matches FROM query_results "
+             "WHERE fingerprint = $1 AND extractor_version = $2"),
+            fingerprint,
+            version
+        )
+        return {row['year']: row['matches'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при получении кэша запроса: {e}')
+        return {}
+
+
+async def save_query_result(fingerprint: str,
+                            year: int,
+                            matches: str,
+                            version: int,
+                            conn):
+    try:
+        await conn.execute(
+            ("INSERT INTO query_results "
+             "(fingerprint, year, extractor_version, matches) "
+             "VALUES ($1, $2, $3, $4::jsonb) "
+             "ON CONFLICT (fingerprint, year) DO UPDATE "
+             "SET extractor_version = EXCLUDED.extractor_version, "
+             "matches = EXCLUDED.matches, computed_at = now()"),
+            fingerprint,
+            year,
+            version,
+            matches
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении кэша запроса: {e}')
+
+
+async def save_mp_directory(letter: str, people: List[Tuple], conn):
+    """
+    people — список (slug, full_name, surname, dates) со страницы буквы.
+    Отметка о букве пишется последней: без неё справочник по букве
+    считается неготовым и поиск идёт по странице.
+    """
+    try:
+        await conn.execute(
+            "DELETE FROM mp_directory WHERE letter = $1",
+            letter
+        )
+        await conn.executemany(
+            ("INSERT INTO mp_directory "
+             "(slug, letter, full_name, surname, dates) "
+             "VALUES ($1, $2, $3, $4, $5) "
+             "ON CONFLICT (slug) DO UPDATE "
+             "SET letter = EXCLUDED.letter, "
+             "full_name = EXCLUDED.full_name, "
+             "surname = EXCLUDED.surname, dates = EXCLUDED.dates"),
+            [(slug, letter, full_name, surname, dates)
+             for slug, full_name, surname, dates in people]
+        )
+        await conn.execute(
+            ("INSERT INTO mp_directory_letters (letter) VALUES ($1) "
+             "ON CONFLICT (letter) DO UPDATE SET refreshed_at = now()"),
+            letter
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении справочника персон: {e}')
+
+
+async def get_mp_directory_letters(max_age_hours: float,
+                                   conn) -> Set[str]:
+    """Буквы, справочник по которым обновлялся не раньше max_age_hours."""
+    try:
+        rows = await conn.fetch(
+            ("SELECT letter FROM mp_directory_letters "
+             "WHERE refreshed_at > now() - make_interval(secs => $1)"),
+            max_age_hours * 3600
+        )
+        return {row['letter'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при получении справочника персон: {e}')
+        return set()
+
+
+async def is_mp_letter_loaded(letter: str, conn) -> bool:
+    return bool(await conn.fetchval(
+        "SELECT 1 FROM mp_directory_letters WHERE letter = $1",
+        letter
+    ))
+
+
+async def search_mp_directory(surname: str, letter: str, conn):
+    """
+    Персоны, чья фамилия начинается с surname, и персоны на букву
+    letter, в имени которых есть surname (как на странице буквы).
+    """
+    return await conn.fetch(
+        ("SELECT slug, full_name, dates FROM mp_directory "
+         "WHERE surname LIKE $1 "
+         "OR (letter = $2 AND upper(full_name) LIKE $3) "
+         "ORDER BY surname <> $4, surname, full_name"),
+        like_pattern(surname)[1:],
+        letter,
+        like_pattern(surname),
+        surname
+    )
+
+
+async def search_mp_directory_fuzzy(surname: str, limit: int, conn):
+    """Персоны с похожей фамилией (триграммное сходство pg_trgm)."""
+    try:
+        return await conn.fetch(
+            ("SELECT slug, full_name, dates FROM mp_directory "
+             "WHERE surname % $1 "
+             "ORDER BY similarity(surname, $1) DESC, full_name "
+             "LIMIT $2"),
+            surname,
+            limit
+        )
+    except Exception as e:
+        logging.error(f'Ошибка нечёткого поиска персон: {e}')
+        return []
+
+
+async def get_mp_profile(slug: str, conn) -> List[int] | None:
+    """Годы активности персоны или None, если профиль не загружен."""
+    try:
+        years = await conn.fetchval(
+            "SELECT years FROM mp_profiles WHERE slug = $1",
+            slug
+        )
+        return None if years is None else list(years)
+    except Exception as e:
+        logging.error(f'Ошибка при получении профиля {slug}: {e}')
+        return None
+
+
+async def save_mp_profile(slug: str, years: List[int], conn):
+    try:
+        await conn.execute(
+            ("INSERT INTO mp_profiles (slug, years) VALUES ($1, $2) "
+             "ON CONFLICT (slug) DO UPDATE "
+             "SET years = EXCLUDED.years, loaded_at = now()"),
+            slug,
+            years
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении профиля {slug}: {e}')
+
+
+async def get_mp_profile_years(slug: str,
+                               years: List[int],
+                               conn) -> Set[int]:
+    """Годы из years, выступления за которые уже загружены."""
+    if not years:
+        return set()
+    try:
+        rows = await conn.fetch(
+            ("SELECT year FROM mp_profile_years "
+             "WHERE slug = $1 AND year = ANY($2::int[])"),
+            slug,
+            years
+        )
+        return {row['year'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при получении профиля {slug}: {e}')
+        return set()
+
+
+async def get_mp_year_contributions(slug: str,
+                                    years: List[int],
+                                    conn) -> Dict[int, List]:
+    """Выступления персоны по загруженным годам: {год: строки}."""
+    if not years:
+        return {}
+    contributions = {year: [] for year in years}
+    try:
+        rows = await conn.fetch(
+            ("SELECT year, date, title, href FROM mp_year_contributions "
+             "WHERE slug = $1 AND year = ANY($2::int[]) "
+             "ORDER BY year, position"),
+            slug,
+            years
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при получении выступлений {slug}: {e}')
+        return {}
+    for row in rows:
+        contributions[row['year']].append(row)
+    return contributions
+
+
+async def save_mp_year_contributions(slug: str,
+                                     contributions: Dict[int, List[Tuple]],
+                                     conn):
+    """
+    contributions — {год: список (дата, заголовок, ссылка)}.
+    Отметки о годах пишутся последними.
+    """
+    if not contributions:
+        return
+    years = list(contributions)
+    try:
+        await conn.execute(
+            ("DELETE FROM mp_year_contributions "
+             "WHERE slug = $1 AND year = ANY($2::int[])"),
+            slug,
+            years
+        )
+        await conn.executemany(
+            ("INSERT INTO mp_year_contributions "
+             "(slug, year, position, date, title, href) "
+             "VALUES ($1, $2, $3, $4, $5, $6)"),
+            [(slug, year, position, date, title, href)
+             for year, items in contributions.items()
+             for position, (date, title, href) in enumerate(items)]
+        )
+        await conn.executemany(
+            ("INSERT INTO mp_profile_years (slug, year) VALUES ($1, $2) "
+             "ON CONFLICT (slug, year) DO UPDATE SET loaded_at = now()"),
+            [(slug, year) for year in years]
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при сохранении выступлений {slug}: {e}')
+
+
+async def search_mp_titles(slug: str,
+                           years: List[int],
+                           keyword: str,
+                           whole_word: bool,
+                           conn):
+    """
+    Выступления персоны за годы years, в заголовке которых есть
+    подстрока keyword (в верхнем регистре) или слово keyword целиком.
+    """
+    if not years:
+        return []
+    if whole_word:
+        condition, pattern = '~', word_pattern(keyword)
+    else:
+        condition, pattern = 'LIKE', like_pattern(keyword)
+    try:
+        return await conn.fetch(
+            ("SELECT year, date, title, href FROM mp_year_contributions "
+             "WHERE slug = $1 AND year = ANY($2::int[]) "
+             f"AND upper(title) {condition} $3 "
+             "ORDER BY year, position"),
+            slug,
+            years,
+            pattern
+        )
+    except Exception as e:
+        logging.error(f'Ошибка при поиске по выступлениям {slug}: {e}')
+        return []
+
+
+async def search_speaker_texts(speaker: str,
+                               year: int,
+                               section_urls: List[str],
+                               keyword: str,
+                               whole_word: bool,
+                               conn) -> Set[str]:
+    """
+    Обсуждения из section_urls за год, в которых персона speaker
+    сказала подстроку keyword (в верхнем регистре) или, при
+    whole_word, слово keyword целиком.
+    """
+    if not section_urls:
+        return set()
+    if whole_word:
+        condition, pattern = '~', word_pattern(keyword)
+    else:
+        condition, pattern = 'LIKE', like_pattern(keyword)
+    try:
+        rows = await conn.fetch(
+            ("SELECT DISTINCT section_url FROM contributions "
+             "WHERE speaker_slug = $1 AND sitting_year = $2 "
+             "AND section_url = ANY($3::text[]) "
+             f"AND upper(text) {condition} $4"),
+            speaker,
+            year,
+            section_urls,
+            pattern
+        )
+        return {row['section_url'] for row in rows}
+    except Exception as e:
+        logging.error(f'Ошибка при поиске по выступлениям {speaker}: {e}')
+        return set()
@@ -0,0 +1,85 @@
+"""
+Перенос страниц, сохранённых до появления сжатия, в content_blob.
+
+Запуск: python -m app.db.migrations [--train-dict путь_к_словарю]
+"""
+import argparse
+import asyncio
+import logging
+
+from ..utils.compression import compress, train_dictionary
+from .constants import DICT_TRAINING_SAMPLES, MIGRATION_BATCH_SIZE
+from .db import close_pool, create_tables, init_pool
+
+
+async def compress_documents(conn, batch_size: int = MIGRATION_BATCH_SIZE):
+    """Сжимает строки documents, у которых ещё нет content_blob."""
+    migrated = raw_bytes = compressed_bytes = 0
+    while True:
+        rows = await conn.fetch(
+            ("SELECT id, content FROM documents "
+             "WHERE content_blob IS NULL AND content IS NOT NULL "
+             "ORDER BY id LIMIT $1"),
+            batch_size
+        )
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            blob = compress(row['content'])
+            raw_bytes += len(row['content'].encode('utf-8'))
+            compressed_bytes += len(blob)
+            updates.append((row['id'], blob))
+        await conn.executemany(
+            ("UPDATE documents SET content_blob = $2, content = NULL "
+             "WHERE id = $1"),
+            updates
+        )
+        migrated += len(rows)
+        logging.info(f'[DB] Сжато документов: {migrated}')
+    ratio = raw_bytes / compressed_bytes if compressed_bytes else 0
+    logging.info(f'[DB] Миграция завершена: {migrated} документов, '
+                 f'{raw_bytes} → {compressed_bytes} байт (×{ratio:.1f})')
+    return migrated
+
+
+async def train_dictionary_from_documents(
+        conn,
+        path: str,
+        samples: int = DICT_TRAINING_SAMPLES):
+    """
+    Обучает словарь zstd на случайной выборке несжатых страниц.
+    Обучать нужно до compress_documents: после неё content пуст.
+    """
+    rows = await conn.fetch(
+        ("SELECT content FROM documents WHERE content IS NOT NULL "
+         "ORDER BY random() LIMIT $1"),
+        samples
+    )
+    dictionary = train_dictionary([row['content'] for row in rows])
+    with open(path, 'wb') as f:
+        f.write(dictionary)
+    logging.info(f'[DB] Словарь zstd ({len(dictionary)} байт) '
+                 f'обучен на {len(rows)} страницах и сохранён в {path}')
+
+
+async def main(train_dict: str | None):
+    pool = await init_pool()
+    try:
+        async with pool.acquire() as conn:
+            await create_tables(conn)
+            if train_dict:
+                await train_dictionary_from_documents(conn, train_dict)
+            else:
+                await compress_documents(conn)
+    finally:
+        await close_pool()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--train-dict',
+                        help='обучить словарь zstd и сохранить по пути')
+    asyncio.run(main(parser.parse_args().train_dict))
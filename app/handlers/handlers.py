@@ -3,20 +3,23 @@ import os
 from pathlib import Path
 
 from aiogram import F, Router
-from aiogram.filters import CommandStart
+from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from dotenv import load_dotenv
 
 import app.utils.parse as p
 
-from ..db.db import get_conn
+from ..db.db import get_pool
 from ..keyboards import keyboards as kb
 from ..messages import messages as m
 from ..redis.redis_client import get_redis_client
 from ..states import states as s
-from ..tasks.tasks import add_user_to_queue, background_parse_task
+from ..tasks.job_queue import enqueue_job
+from ..tasks.tasks import cancel_jobs, request_partial_results
 from ..utils import validators as v
+from ..utils.matching import parse_keywords
+from ..utils.text_search import is_range_indexed
 
 router = Router()
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -31,6 +34,19 @@ async def cmd_start(message: Message):
     await message.answer(m.START_MESSAGE, reply_markup=kb.main)
 
 
+@router.message(Command('cancel'))
+async def cmd_cancel(message: Message, state: FSMContext):
+    logging.info(f'{message.from_user.first_name} отменяет поиск')
+    await state.clear()
+    count = await cancel_jobs(message.chat.id)
+    if count:
+        await message.answer(f'Поиск отменён (заданий: {count}) ✅',
+                             reply_markup=kb.main)
+    else:
+        await message.answer(m.NOTHING_TO_CANCEL_MESSAGE,
+                             reply_markup=kb.main)
+
+
 @router.callback_query(F.data == 'back_to_menu')
 async def main_menu(callback: CallbackQuery, state: FSMContext):
     await state.clear()
@@ -72,18 +88,11 @@ async def list_of_mps(message: Message, state: FSMContext):
     data = await state.get_data()
     data['surname'] = data['surname'].title()
     bot = message.bot
-    conn = await get_conn()
-    redis_client = get_redis_client()
-    try:
-        mps = await p.get_list_of_mps(data['surname'],
-                                      data,
-                                      conn,
-                                      redis_client,
-                                      bot)
-    finally:
-        await conn.close()
-        await redis_client.close()
-        await redis_client.connection_pool.disconnect()
+    mps, similar = await p.get_list_of_mps(data['surname'],
+                                           data,
+                                           get_pool(),
+                                           get_redis_client(),
+                                           bot)
 
     if not mps or not mps[0]:
         await message.answer(m.SURNAME_ERROR)
@@ -96,6 +105,8 @@ async def list_of_mps(message: Message, state: FSMContext):
         await ask_for_surname(message, state)
     else:
         await state.update_data(mps=mps)
+        if similar:
+            await message.answer(m.SIMILAR_SURNAMES_MESSAGE)
         await message.answer(
             await m.build_persons_message(mps=mps),
             parse_mode='HTML',
@@ -173,6 +184,10 @@ async def type_key_word(callback: CallbackQuery, state: FSMContext):
 async def type_from_date(message: Message, state: FSMContext):
     logging.info(f'{message.from_user.first_name} '
                  f'ввёл ключевое слово {message.text}')
+    if not await v.validate_keywords(message.text):
+        await message.answer(m.KEYWORD_ERROR,
+                             reply_markup=kb.to_main)
+        return
     await state.update_data(keyword=message)
     await state.set_state(s.SearchByWord.from_date)
     await message.answer(m.FROM_DATE_MESSAGE,
@@ -202,25 +217,44 @@ async def pre_parsing(message: Message, state: FSMContext):
     no_person_date_bool = await v.validate_no_person_date(
         data['from_date'],
         data['to_date'],
-        'person_info' in data.keys()
+        'person_info' in data.keys(),
+        await is_range_indexed(data, get_pool())
         )
     if validator_bool and no_person_date_bool:
-        data['keyword'] = data['keyword'].text.upper()
+        data['keywords'] = parse_keywords(data['keyword'].text)
+        data['keyword'] = ', '.join(data['keywords'])
+        queued = await enqueue_job(data)
+        await state.clear()
+        if queued is None:
+            await message.answer(m.QUEUE_LIMIT_MESSAGE,
+                                 reply_markup=kb.to_main)
+            return
+        _, position, attached = queued
         await message.answer(
                 m.WAITING_MESSAGE,
                 reply_markup=kb.to_main
                 )
-        position = await add_user_to_queue(data)
+        if attached:
+            status = m.JOINED_SEARCH_MESSAGE
+        else:
+            status = (f'Вы №{position} в очереди ⏳ '
+                      'Когда дойдёт ваша очередь — бот начнёт обработку!')
         await message.answer(
-            f'Вы №{position} в очереди ⏳ '
-            'Когда дойдёт ваша очередь — бот начнёт обработку!\n'
+            f'{status}\n'
             f'Запрос {data['keyword']}, {data['from_date']}, '
-            f'{data['to_date']}.'
+            f'{data['to_date']}.\n'
+            'Отменить поиск: /cancel'
         )
-        background_parse_task.delay(data)
-        await state.clear()
     else:
         await message.answer(
                 m.DATE_ERROR
             )
         await type_from_date(data['keyword'], state)
+
+
+@router.callback_query(F.data == 'partial_results')
+async def partial_results(callback: CallbackQuery):
+    logging.info(f'{callback.from_user.first_name} '
+                 'запросил промежуточный файл')
+    await request_partial_results(callback.message.chat.id)
+    await callback.answer(m.PARTIAL_RESULTS_MESSAGE)
@@ -21,6 +21,13 @@ to_main = InlineKeyboardMarkup(
                                            callback_data='back_to_menu'),]],
     )
 
+partial_results = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(
+        text='Прислать промежуточный файл',
+        callback_data='partial_results'
+        )]],
+    )
+
 
 async def build_searching_ways_keyboard(person: bool) -> InlineKeyboardMarkup:
     keyboard = [
@@ -20,7 +20,14 @@ START_MESSAGE = (
 
 TYPE_SURNAME_MESSAGE = 'Введите фамилию депутата на английском.'
 
-TYPE_KEYWORD_MESSAGE = 'Введите слово для поиска на английском.'
+TYPE_KEYWORD_MESSAGE = ('Введите слово для поиска на английском.\n'
+                        'Можно ввести несколько слов через запятую '
+                        '(не больше 10) — поиск пройдёт за один раз, '
+                        'а в файле результаты будут сгруппированы по словам.\n'
+                        'Слово в кавычках ищется только целиком: '
+                        '"war" не найдёт "warrant".')
+
+KEYWORD_ERROR = 'Введите от 1 до 10 слов для поиска через запятую.'
 
 SURNAME_ERROR = ('Депутаты с такой фамилией не найдены. '
                  'Убедитесь, что ввели фамилию на английском языке')
@@ -51,6 +58,18 @@ DATE_ERROR = ('Неправильный ввод даты, повторите. '
               'В случае поиска по всем заседаниям разброс дат – '
               'не более 10 лет')
 
+QUEUE_LIMIT_MESSAGE = ('У вас уже есть несколько поисков в очереди. '
+                       'Дождитесь их или отмените командой /cancel.')
+
+NOTHING_TO_CANCEL_MESSAGE = 'Нет поисков, которые можно отменить.'
+
+PARTIAL_RESULTS_MESSAGE = ('Пришлю промежуточный файл, '
+                           'как только закончится текущий год.')
+SIMILAR_SURNAMES_MESSAGE = ('Точных совпадений нет, '
+                            'вот персоны с похожей фамилией 🔎')
+JOINED_SEARCH_MESSAGE = ('Такой же поиск уже идёт или стоит в очереди 🔁 '
+                         'Файл придёт, как только он закончится.')
+
 
 async def build_persons_message(mps, page: int = 0) -> str:
     page_items = mps[page]
@@ -58,4 +77,4 @@ async def build_persons_message(mps, page: int = 0) -> str:
     for name in page_items:
         message_text += f'• {name[0]}\n'
     message_text += f'\nСтраница {page + 1} из {len(mps)}'
-    return message_text
\ No newline at end of file
+    return message_text
@@ -1,5 +1,8 @@
+import asyncio
 import os
+import weakref
 from pathlib import Path
+from typing import Dict, List
 
 import redis.asyncio as aioredis
 from dotenv import load_dotenv
@@ -12,15 +15,61 @@ REDIS_HOST = os.getenv('REDIS_HOST')
 REDIS_PORT = int(os.getenv('REDIS_PORT'))
 REDIS_DB_PAGES = int(os.getenv('REDIS_DB_PAGES'))
 REDIS_DB_QUEUE = int(os.getenv('REDIS_DB_QUEUE'))
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+REDIS_BATCH_SIZE = 500
+
+# Соединения redis.asyncio привязаны к циклу событий,
+# поэтому клиенты кэшируются отдельно для каждого цикла.
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_client(db: int) -> aioredis.Redis:
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    if db not in loop_clients:
+        loop_clients[db] = aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=db,
+                max_connections=REDIS_MAX_CONNECTIONS
+            )
+        )
+    return loop_clients[db]
 
 
 def get_redis_client():
-    return aioredis.Redis(host=REDIS_HOST,
-                          port=REDIS_PORT,
-                          db=REDIS_DB_PAGES)
+    return _get_client(REDIS_DB_PAGES)
 
 
 def get_redis_queue():
-    return aioredis.Redis(host=REDIS_HOST,
-                          port=REDIS_PORT,
-                          db=REDIS_DB_QUEUE)
\ No newline at end of file
+    return _get_client(REDIS_DB_QUEUE)
+
+
+async def close_redis_clients():
+    """Закрывает клиенты текущего цикла событий."""
+    loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.aclose(close_connection_pool=True)
+
+
+async def get_many(redis_client, keys: List[str]) -> List[bytes | None]:
+    """Читает много ключей пачками MGET."""
+    values = []
+    for start in range(0, len(keys), REDIS_BATCH_SIZE):
+        values.extend(
+            await redis_client.mget(keys[start:start + REDIS_BATCH_SIZE])
+        )
+    return values
+
+
+async def set_many(redis_client, mapping: Dict[str, str | bytes],
+                   ex: int | None = None):
+    """Записывает много ключей одним конвейером без транзакции."""
+    if not mapping:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=ex)
+        await pipe.execute()
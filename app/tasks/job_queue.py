@@ -0,0 +1,313 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import app.utils.constants as c
+
+from ..redis.redis_client import get_redis_queue
+from ..utils.matching import query_keywords
+
+# Очередь заданий — сортированное множество: счёт задания равен
+# раунду пользователя * QUEUE_ROUND_SIZE + номеру поступления.
+# N-е ожидающее задание пользователя попадает в раунд N после текущего,
+# поэтому пользователи чередуются, а не ждут чужие пачки запросов.
+
+# Присоединяет получателя, только пока ключ такого же поиска указывает
+# на задание: после release_flight получателей задания больше не станет.
+ATTACH_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1]
+        or redis.call('exists', KEYS[2]) == 0 then
+    return 0
+end
+redis.call('hset', KEYS[3], ARGV[2], ARGV[3])
+redis.call('sadd', KEYS[4], ARGV[1])
+return 1
+"""
+
+# Снимает ключ такого же поиска, только если он ещё указывает на задание.
+RELEASE_FLIGHT_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def job_key(job_id: str) -> str:
+    return f'{c.JOB_KEY}:{job_id}'
+
+
+def recipients_key(job_id: str) -> str:
+    return f'{c.JOB_RECIPIENTS_KEY}:{job_id}'
+
+
+def user_attached_key(chat_id: int) -> str:
+    return f'{c.ATTACHED_JOBS_KEY}:{chat_id}'
+
+
+def job_fingerprint(data: dict) -> str:
+    """Отпечаток запроса: одинаковые поиски разных пользователей совпадают."""
+    query = {field: data.get(field)
+             for field in ('person_info', 'writings', 'way',
+                           'from_date', 'to_date')}
+    query['keywords'] = sorted(query_keywords(data))
+    return hashlib.sha1(
+        json.dumps(query, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+def flight_key(data: dict) -> str:
+    return f'{c.JOB_FLIGHT_KEY}:{job_fingerprint(data)}'
+
+
+def user_queue_key(chat_id: int) -> str:
+    return f'{c.CELERY_QUEUE_TABLE_NAME}:{chat_id}'
+
+
+def user_running_key(chat_id: int) -> str:
+    return f'{c.RUNNING_JOBS_KEY}:{chat_id}'
+
+
+async def attach_to_job(job_id: str, data: dict) -> bool:
+    """Добавляет пользователя получателем файла уже идущего задания."""
+    return bool(await get_redis_queue().eval(
+        ATTACH_SCRIPT,
+        4,
+        flight_key(data),
+        job_key(job_id),
+        recipients_key(job_id),
+        user_attached_key(data['chat_id']),
+        job_id,
+        data['chat_id'],
+        data['user_first_name']
+    ))
+
+
+async def release_flight(data: dict):
+    """
+    Перестаёт присоединять такие же поиски к заданию: новые запросы
+    запустят своё задание. Вызывается перед рассылкой файла, чтобы
+    никто не присоединился после того, как получатели прочитаны.
+    """
+    job_id = data.get('job_id')
+    if job_id is None:
+        return
+    await get_redis_queue().eval(RELEASE_FLIGHT_SCRIPT,
+                                 1,
+                                 flight_key(data),
+                                 job_id)
+
+
+async def enqueue_job(data: dict) -> Tuple[str, int | None, bool] | None:
+    """
+    Ставит поиск в очередь и возвращает (id задания, место в очереди,
+    присоединён ли запрос к такому же идущему заданию) или None,
+    если у пользователя уже MAX_QUEUED_JOBS_PER_USER заданий.
+    Такой же поиск, уже стоящий в очереди или запущенный, не
+    запускается повторно: пользователь получит файл того задания.
+    """
+    redis = get_redis_queue()
+    chat_id = data['chat_id']
+    job_id = uuid.uuid4().hex
+    while not await redis.set(flight_key(data),
+                              job_id,
+                              nx=True,
+                              ex=c.JOB_TIMEOUT):
+        running_id = await redis.get(flight_key(data))
+        if running_id and await attach_to_job(running_id.decode(), data):
+            running_id = running_id.decode()
+            logging.info(f'{data['user_first_name']} присоединён '
+                         f'к заданию {running_id}')
+            return running_id, await queue_position(running_id), True
+        await redis.delete(flight_key(data))
+    if await redis.scard(user_queue_key(chat_id)) >= (
+            c.MAX_QUEUED_JOBS_PER_USER):
+        await redis.delete(flight_key(data))
+        return None
+    current_round = int(await redis.get(c.QUEUE_ROUND_KEY) or 0)
+    user_round = int(await redis.hget(c.USER_ROUNDS_KEY, chat_id) or 0)
+    job_round = max(current_round, user_round) + 1
+    sequence = await redis.incr(c.JOB_SEQUENCE_KEY)
+    score = job_round * c.QUEUE_ROUND_SIZE + sequence % c.QUEUE_ROUND_SIZE
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(job_key(job_id), mapping={
+            'data': json.dumps(dict(data, job_id=job_id),
+                               ensure_ascii=False),
+            'chat_id': chat_id,
+            'round': job_round,
+        })
+        pipe.hset(recipients_key(job_id), chat_id, data['user_first_name'])
+        pipe.hset(c.USER_ROUNDS_KEY, chat_id, job_round)
+        pipe.sadd(user_queue_key(chat_id), job_id)
+        pipe.zadd(c.CELERY_QUEUE_TABLE_NAME, {job_id: score})
+        await pipe.execute()
+    return job_id, await queue_position(job_id), False
+
+
+async def queue_position(job_id: str) -> int | None:
+    """Место задания в очереди, начиная с 1; None — уже не в очереди."""
+    rank = await get_redis_queue().zrank(c.CELERY_QUEUE_TABLE_NAME, job_id)
+    return None if rank is None else rank + 1
+
+
+async def pop_next_job() -> dict | None:
+    """
+    Забирает из очереди первое задание пользователя, у которого
+    запущено меньше MAX_RUNNING_JOBS_PER_USER заданий, если всего
+    запущено меньше MAX_RUNNING_JOBS.
+    """
+    redis = get_redis_queue()
+    if await redis.zcard(c.RUNNING_JOBS_KEY) >= c.MAX_RUNNING_JOBS:
+        return None
+    for job_id in await redis.zrange(c.CELERY_QUEUE_TABLE_NAME, 0, 99):
+        job_id = job_id.decode()
+        job = await redis.hgetall(job_key(job_id))
+        if not job:
+            await redis.zrem(c.CELERY_QUEUE_TABLE_NAME, job_id)
+            continue
+        chat_id = int(job[b'chat_id'])
+        if await redis.scard(user_running_key(chat_id)) >= (
+                c.MAX_RUNNING_JOBS_PER_USER):
+            continue
+        job_round = int(job[b'round'])
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(c.CELERY_QUEUE_TABLE_NAME, job_id)
+            pipe.srem(user_queue_key(chat_id), job_id)
+            pipe.zadd(c.RUNNING_JOBS_KEY, {job_id: time.time()})
+            pipe.sadd(user_running_key(chat_id), job_id)
+            await pipe.execute()
+        if job_round > int(await redis.get(c.QUEUE_ROUND_KEY) or 0):
+            await redis.set(c.QUEUE_ROUND_KEY, job_round)
+        return json.loads(job[b'data'])
+    return None
+
+
+async def add_job_tasks(job_id: str, task_ids: List[str]):
+    """Запоминает id задач Celery задания, чтобы их можно было отменить."""
+    redis = get_redis_queue()
+    stored = await redis.hget(job_key(job_id), 'task_ids')
+    task_ids = json.loads(stored or '[]') + task_ids
+    await redis.hset(job_key(job_id), 'task_ids', json.dumps(task_ids))
+
+
+async def job_recipients(job_id: str | None) -> Dict[int, str]:
+    """Получатели файла задания: {chat_id: имя}."""
+    if job_id is None:
+        return {}
+    recipients = await get_redis_queue().hgetall(recipients_key(job_id))
+    return {int(chat_id): name.decode()
+            for chat_id, name in recipients.items()}
+
+
+async def job_owner(job_id: str | None) -> int | None:
+    """Чей сейчас поиск: владелец задания или None, если его уже нет."""
+    if job_id is None:
+        return None
+    owner = await get_redis_queue().hget(job_key(job_id), 'chat_id')
+    return None if owner is None else int(owner)
+
+
+async def transfer_job(job_id: str, chat_id: int):
+    """
+    Передаёт задание от отменившего его владельца оставшемуся
+    получателю: задание перестаёт считаться в лимитах отменившего
+    и засчитывается новому владельцу.
+    """
+    redis = get_redis_queue()
+    job = await redis.hgetall(job_key(job_id))
+    recipients = await job_recipients(job_id)
+    if not job or not recipients:
+        return
+    owner, name = next(iter(recipients.items()))
+    data = dict(json.loads(job[b'data']),
+                chat_id=owner,
+                user_first_name=name)
+    queued = await redis.sismember(user_queue_key(chat_id), job_id)
+    running = await redis.sismember(user_running_key(chat_id), job_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(job_key(job_id), mapping={
+            'data': json.dumps(data, ensure_ascii=False),
+            'chat_id': owner,
+        })
+        pipe.srem(user_queue_key(chat_id), job_id)
+        pipe.srem(user_running_key(chat_id), job_id)
+        pipe.srem(user_attached_key(owner), job_id)
+        if queued:
+            pipe.sadd(user_queue_key(owner), job_id)
+        if running:
+            pipe.sadd(user_running_key(owner), job_id)
+        await pipe.execute()
+    if queued:
+        owner_round = int(await redis.hget(c.USER_ROUNDS_KEY, owner) or 0)
+        await redis.hset(c.USER_ROUNDS_KEY,
+                         owner,
+                         max(owner_round, int(job[b'round'])))
+    if not await redis.scard(user_queue_key(chat_id)):
+        await redis.hdel(c.USER_ROUNDS_KEY, chat_id)
+    logging.info(f'Задание {job_id} передано {name}')
+
+
+async def finish_job(job_id: str | None) -> List[str]:
+    """Убирает задание из очереди и запущенных; возвращает id его задач."""
+    if job_id is None:
+        return []
+    redis = get_redis_queue()
+    job = await redis.hgetall(job_key(job_id))
+    recipients = await job_recipients(job_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zrem(c.CELERY_QUEUE_TABLE_NAME, job_id)
+        pipe.zrem(c.RUNNING_JOBS_KEY, job_id)
+        pipe.delete(job_key(job_id), recipients_key(job_id))
+        for recipient in recipients:
+            pipe.srem(user_attached_key(recipient), job_id)
+        if job:
+            chat_id = int(job[b'chat_id'])
+            data = json.loads(job[b'data'])
+            pipe.srem(user_queue_key(chat_id), job_id)
+            pipe.srem(user_running_key(chat_id), job_id)
+        await pipe.execute()
+    if job:
+        await release_flight(data)
+    if job and not await redis.scard(user_queue_key(chat_id)):
+        await redis.hdel(c.USER_ROUNDS_KEY, chat_id)
+    return json.loads(job.get(b'task_ids') or '[]')
+
+
+async def cancel_user_jobs(chat_id: int) -> Tuple[int, List[str]]:
+    """
+    Снимает все поиски пользователя: ожидающие, запущенные
+    и те, к которым он присоединён. Задание, которого ждут другие
+    получатели, не снимается — пользователь только перестаёт
+    быть получателем, а своё задание передаёт одному из них.
+    Возвращает число поисков и id задач Celery для отзыва.
+    """
+    redis = get_redis_queue()
+    job_ids = (await redis.smembers(user_queue_key(chat_id)) |
+               await redis.smembers(user_running_key(chat_id)) |
+               await redis.smembers(user_attached_key(chat_id)))
+    task_ids = []
+    for job_id in job_ids:
+        job_id = job_id.decode()
+        await redis.hdel(recipients_key(job_id), chat_id)
+        await redis.srem(user_attached_key(chat_id), job_id)
+        if await redis.hlen(recipients_key(job_id)):
+            if await job_owner(job_id) == chat_id:
+                await transfer_job(job_id, chat_id)
+            continue
+        task_ids += await finish_job(job_id)
+    return len(job_ids), task_ids
+
+
+async def expire_stale_jobs():
+    """Снимает задания, которые числятся запущенными дольше JOB_TIMEOUT."""
+    redis = get_redis_queue()
+    stale = await redis.zrangebyscore(c.RUNNING_JOBS_KEY,
+                                      0,
+                                      time.time() - c.JOB_TIMEOUT)
+    for job_id in stale:
+        logging.warning(f'Задание {job_id.decode()} не завершилось '
+                        f'за {c.JOB_TIMEOUT} с, снимаем')
+        await finish_job(job_id.decode())
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+import httpx
+from aiogram import Bot
+from dotenv import load_dotenv
+
+from ..db.db import close_pool, init_pool
+from ..redis.redis_client import close_redis_clients, get_redis_client
+from ..utils.crawler import create_client
+from ..utils.local_cache import page_cache
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+load_dotenv(dotenv_path=BASE_DIR / '.env')
+BOT_TOKEN = os.getenv('TOKEN')
+
+
+class WorkerRuntime:
+    """
+    Окружение процесса воркера: один цикл событий и долгоживущие
+    пул PostgreSQL, клиент Redis, бот и HTTP-клиент на все задачи.
+    Пул, Redis и сессия бота привязаны к циклу, поэтому цикл
+    тоже один на процесс.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.pool = None
+        self.redis_client = None
+        self.bot = None
+        self.client: httpx.AsyncClient | None = None
+
+    async def _open(self):
+        self.pool = await init_pool()
+        self.redis_client = get_redis_client()
+        self.bot = Bot(token=BOT_TOKEN)
+        self.client = create_client()
+
+    async def _close(self):
+        try:
+            await self.client.aclose()
+            await self.bot.session.close()
+        finally:
+            await close_pool()
+            await close_redis_clients()
+
+    def start(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._open())
+        logging.info('Окружение воркера запущено')
+
+    def run(self, handler, *args):
+        """Выполняет корутину задачи в цикле процесса с общими клиентами."""
+        return self.loop.run_until_complete(handler(*args,
+                                                    self.pool,
+                                                    self.redis_client,
+                                                    self.bot,
+                                                    self.client))
+
+    def stop(self):
+        try:
+            self.loop.run_until_complete(self._close())
+        finally:
+            self.loop.close()
+            logging.info(f'Кэш страниц в памяти: {page_cache.stats()}')
+            logging.info('Окружение воркера остановлено')
+
+
+_runtime: WorkerRuntime | None = None
+
+
+def start_runtime() -> WorkerRuntime:
+    global _runtime
+    if _runtime is None:
+        runtime = WorkerRuntime()
+        runtime.start()
+        _runtime = runtime
+    return _runtime
+
+
+def get_runtime() -> WorkerRuntime:
+    """
+    Окружение текущего процесса. Обычно его поднимает сигнал
+    worker_process_init, а без префорка (--pool=solo) — первая задача.
+    """
+    return start_runtime()
+
+
+def stop_runtime():
+    global _runtime
+    if _runtime is None:
+        return
+    runtime, _runtime = _runtime, None
+    runtime.stop()
@@ -2,40 +2,84 @@ import asyncio
 import logging
 import os
 from pathlib import Path
+from typing import Tuple
+from uuid import uuid4
 
 from aiogram import Bot
 from aiogram.types import FSInputFile
-from celery import Celery
+from celery import Celery, chord
+from celery.signals import (worker_process_init, worker_process_shutdown,
+                            worker_shutdown)
 from dotenv import load_dotenv
 
 import app.utils.constants as c
 from app.keyboards import keyboards as kb
 from app.utils import parse as p
-from app.utils.making_file import save_parsed_data
+from app.utils.making_file import ResultWriter
+from app.utils.matching import query_keywords
+from app.utils.progress import Progress, current_progress
 
-from ..db.db import get_conn
-from ..redis.redis_client import get_redis_client, get_redis_queue
+from ..redis.redis_client import get_redis_queue
+from .job_queue import (add_job_tasks, cancel_user_jobs, expire_stale_jobs,
+                        finish_job, job_owner, job_recipients, pop_next_job,
+                        release_flight)
+from .runtime import get_runtime, start_runtime, stop_runtime
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 load_dotenv(dotenv_path=BASE_DIR / '.env')
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
+# Бэкенд результатов нужен аккорду подзадач по годам.
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
 celery_app = Celery(
     'tasks',
-    broker=CELERY_BROKER_URL
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND
 )
-BOT_TOKEN = os.getenv('TOKEN')
+# Вместо принудительной сборки мусора на каждой странице процесс
+# воркера перезапускается, если после задачи превысил лимит памяти (КБ).
+celery_app.conf.worker_max_memory_per_child = int(
+    os.getenv('CELERY_MAX_MEMORY_PER_CHILD', 512000)
+)
+
+
+@worker_process_init.connect
+def init_worker_runtime(**kwargs):
+    try:
+        start_runtime()
+    except Exception as e:
+        # Окружение поднимет первая задача.
+        logging.exception(f'Не удалось запустить окружение воркера: {e}')
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_runtime(**kwargs):
+    stop_runtime()
+
+
+async def recipients_of(data: dict) -> list:
+    """
+    Запрос с подставленными получателями: пользователи, отправившие
+    такой же поиск, ждут файл того же задания. У снятого задания
+    (отмена, истёкший срок) получателей нет; запрос без задания
+    получает только его отправитель.
+    """
+    if data.get('job_id') is None:
+        return [data]
+    recipients = await job_recipients(data['job_id'])
+    return [dict(data, chat_id=chat_id, user_first_name=name)
+            for chat_id, name in recipients.items()]
 
 
-async def parse_and_send(data: dict,
-                         parsed_data,
-                         filename: str,
-                         bot: Bot):
-    """Сохраняет файл и отправляет его пользователю."""
+async def send_result_file(data: dict,
+                           file_path: str,
+                           filename: str,
+                           bot: Bot,
+                           caption: str = 'Вот твой файл с результатами 📄'):
+    """Отправляет файл с результатами пользователю."""
     chat_id = data['chat_id']
     user_first_name = data['user_first_name']
 
-    file_path = await save_parsed_data(parsed_data, filename)
-
     if not os.path.exists(file_path):
         await bot.send_message(
             chat_id,
@@ -49,83 +93,378 @@ async def parse_and_send(data: dict,
     await bot.send_document(
         chat_id,
         document,
-        caption='Вот твой файл с результатами 📄',
+        caption=caption,
         reply_markup=kb.to_main,
     )
 
     logging.info(f'{user_first_name} получил файл')
 
 
-async def background_parse(data: dict, conn, redis_client, bot):
-    """Основная логика фонового парсинга."""
-    chat_id = data['chat_id']
-    user_first_name = data['user_first_name']
+async def edit_progress(progress: Progress,
+                        chat_id: int,
+                        message_id: int,
+                        bot: Bot,
+                        final: bool = False,
+                        partial: bool = True):
+    """Обновляет сообщение о ходе поиска."""
     try:
-        result, filename = await p.parsing_fork(data,
-                                                conn,
-                                                redis_client,
-                                                bot)
-        await parse_and_send(data, result, filename, bot)
+        await bot.edit_message_text(
+            progress.text(finished=final),
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=kb.partial_results if partial and not final else None,
+        )
     except Exception as e:
-        logging.exception(f'Ошибка при парсинге для {user_first_name}: {e}')
+        logging.warning(f'Не удалось обновить ход поиска: {e}')
+
+
+async def follow_owner(data: dict,
+                       chat_id: int,
+                       message_id: int,
+                       progress: Progress,
+                       bot: Bot,
+                       partial: bool = True) -> Tuple[int, int]:
+    """
+    Сообщение о ходе поиска у текущего владельца задания: если владелец
+    отменил поиск и задание перешло другому получателю, тому
+    присылается своё сообщение. Возвращает (chat_id, message_id).
+    """
+    owner = await job_owner(data.get('job_id'))
+    if owner is None or owner == chat_id:
+        return chat_id, message_id
+    message = await bot.send_message(
+        owner,
+        progress.text(),
+        reply_markup=kb.partial_results if partial else None
+    )
+    return owner, message.message_id
+
+
+async def chunk_progress_message(data: dict,
+                                 job: str,
+                                 progress: Progress,
+                                 bot: Bot) -> Tuple[int, int] | None:
+    """
+    Общее сообщение о ходе поиска подзадач. Новое сообщение новому
+    владельцу присылает одна подзадача; пока она его не записала,
+    остальные пропускают обновление (None).
+    """
+    redis = get_redis_queue()
+    chat_id, message_id = await redis.hmget(job, 'chat_id', 'message_id')
+    if chat_id is None or message_id is None:
+        return None
+    chat_id, message_id = int(chat_id), int(message_id)
+    owner = await job_owner(data.get('job_id'))
+    if owner is None or owner == chat_id:
+        return chat_id, message_id
+    if not await redis.hsetnx(job, f'moved:{owner}', 1):
+        return None
+    chat_id, message_id = await follow_owner(data,
+                                             chat_id,
+                                             message_id,
+                                             progress,
+                                             bot,
+                                             partial=False)
+    await redis.hset(job, mapping={'chat_id': chat_id,
+                                   'message_id': message_id})
+    return chat_id, message_id
+
+
+async def stream_results(data: dict,
+                         progress: Progress,
+                         chat_id: int,
+                         message_id: int,
+                         conn,
+                         redis_client,
+                         bot,
+                         client=None):
+    """
+    Дописывает найденное в файл погодно, обновляет сообщение о ходе
+    поиска у владельца задания и по запросу присылает ему
+    промежуточный файл.
+    """
+    filename = p.result_filename(data)
+    current_progress.set(progress)
+    async with ResultWriter(data.get('job_id') or uuid4().hex,
+                            query_keywords(data)) as writer:
+        async for _, found in p.parsing_fork(data,
+                                             conn,
+                                             redis_client,
+                                             bot,
+                                             client):
+            await writer.write(found)
+            progress.year_done(sum(map(len, found.values())))
+            if progress.is_report_due(c.PROGRESS_INTERVAL):
+                chat_id, message_id = await follow_owner(data,
+                                                         chat_id,
+                                                         message_id,
+                                                         progress,
+                                                         bot)
+                await edit_progress(progress, chat_id, message_id, bot)
+            if await pop_partial_request(chat_id):
+                partial_path = await writer.snapshot(
+                    p.result_header(data, writer.count)
+                )
+                await send_result_file(
+                    dict(data, chat_id=chat_id),
+                    partial_path,
+                    f'partial.{filename}',
+                    bot,
+                    caption='Промежуточный файл, поиск продолжается ⏳'
+                )
+        file_path = await writer.finalize(
+            p.result_header(data, writer.count)
+        )
+        chat_id, message_id = await follow_owner(data,
+                                                 chat_id,
+                                                 message_id,
+                                                 progress,
+                                                 bot)
+        await edit_progress(progress, chat_id, message_id, bot, final=True)
+        await release_flight(data)
+        for recipient in await recipients_of(data):
+            await send_result_file(recipient, file_path, filename, bot)
+
+
+async def send_parse_error(data: dict, bot: Bot):
+    await release_flight(data)
+    for recipient in await recipients_of(data):
         await bot.send_message(
-            chat_id,
+            recipient['chat_id'],
             'Произошла ошибка при обработке запроса ❌',
             reply_markup=kb.to_main,
         )
 
 
+async def background_parse(data: dict,
+                           conn,
+                           redis_client,
+                           bot,
+                           client=None):
+    """
+    Основная логика фонового парсинга. Долгий поиск по заседаниям
+    делится на подзадачи по годам, остальное выполняется здесь же.
+    Возвращает True, если поиск продолжают подзадачи.
+    """
+    user_first_name = data['user_first_name']
+    try:
+        chunks = await p.plan_year_chunks(data, conn)
+        if chunks:
+            await dispatch_chunks(data, chunks, bot)
+            return True
+        progress = Progress()
+        message = await bot.send_message(data['chat_id'],
+                                         progress.text(),
+                                         reply_markup=kb.partial_results)
+        await stream_results(data,
+                             progress,
+                             data['chat_id'],
+                             message.message_id,
+                             conn,
+                             redis_client,
+                             bot,
+                             client)
+    except Exception as e:
+        logging.exception(f'Ошибка при парсинге для {user_first_name}: {e}')
+        await send_parse_error(data, bot)
+    return False
+
+
+async def dispatch_chunks(data: dict, chunks: list, bot: Bot):
+    """
+    Запускает подзадачи по отрезкам лет аккордом Celery: когда все
+    отрезки посчитаны (и лежат в кэше результатов), файл собирает
+    assemble_results_task.
+    """
+    progress = Progress(int(data['to_date']) - int(data['from_date']) + 1)
+    message = await bot.send_message(data['chat_id'], progress.text())
+    job = f'{c.JOB_PROGRESS_KEY}:{data['chat_id']}:{message.message_id}'
+    redis = get_redis_queue()
+    await redis.hset(job, mapping={'total': progress.total_years,
+                                   'started_at': progress.started_at,
+                                   'chat_id': data['chat_id'],
+                                   'message_id': message.message_id})
+    await redis.expire(job, c.JOB_PROGRESS_TTL)
+    logging.info(f'Поиск для {data['user_first_name']} разбит '
+                 f'на {len(chunks)} подзадач(и): {chunks}')
+    header = [
+        parse_chunk_task.s(dict(data,
+                                from_date=str(from_year),
+                                to_date=str(to_year)),
+                           job,
+                           message.message_id).set(task_id=uuid4().hex)
+        for from_year, to_year in chunks
+    ]
+    callback = assemble_results_task.s(data, job, message.message_id).set(
+        task_id=uuid4().hex
+    )
+    callback.on_error(parse_failed_task.s(data))
+    if 'job_id' in data:
+        await add_job_tasks(data['job_id'],
+                            [task.id for task in header] + [callback.id])
+    chord(header)(callback)
+
+
+async def job_progress(job: str) -> Progress:
+    stats = await get_redis_queue().hgetall(job)
+    return Progress.restore({key.decode(): float(value)
+                             for key, value in stats.items()})
+
+
+async def parse_chunk(data: dict,
+                      job: str,
+                      message_id: int,
+                      conn,
+                      redis_client,
+                      bot,
+                      client=None):
+    """
+    Считает отрезок лет: результаты сохраняются в кэш результатов,
+    ход поиска суммируется в Redis и показывается в общем сообщении.
+    """
+    progress = Progress()
+    current_progress.set(progress)
+    redis = get_redis_queue()
+    async for _, found in p.parsing_fork(data,
+                                         conn,
+                                         redis_client,
+                                         bot,
+                                         client):
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(job, 'years_done', 1)
+            pipe.hincrby(job, 'pages', progress.pages)
+            pipe.hincrby(job, 'matches', sum(map(len, found.values())))
+            await pipe.execute()
+        progress.pages = 0
+        if not progress.is_report_due(c.PROGRESS_INTERVAL):
+            continue
+        stats = await job_progress(job)
+        location = await chunk_progress_message(data, job, stats, bot)
+        if location is not None:
+            await edit_progress(stats, *location, bot, partial=False)
+
+
+async def assemble_results(data: dict,
+                           job: str,
+                           message_id: int,
+                           conn,
+                           redis_client,
+                           bot,
+                           client=None):
+    """Собирает файл из кэша результатов, посчитанного подзадачами."""
+    try:
+        stats = await job_progress(job)
+        progress = Progress(stats.total_years, stats.started_at)
+        progress.pages = stats.pages
+        chat_id, message_id = (
+            await chunk_progress_message(data, job, stats, bot) or
+            (data['chat_id'], message_id)
+        )
+        await stream_results(data,
+                             progress,
+                             chat_id,
+                             message_id,
+                             conn,
+                             redis_client,
+                             bot,
+                             client)
+    except Exception as e:
+        logging.exception(f'Ошибка при сборке файла для '
+                          f'{data['user_first_name']}: {e}')
+        await send_parse_error(data, bot)
+    finally:
+        await get_redis_queue().delete(job)
+        await finish_job(data.get('job_id'))
+
+
+def run_task(handler, *args):
+    """Выполняет корутину задачи в окружении процесса воркера."""
+    return get_runtime().run(handler, *args)
+
+
+async def start_parse(data: dict, conn, redis_client, bot, client):
+    fanned_out = False
+    try:
+        for recipient in await recipients_of(data):
+            await bot.send_message(
+                recipient['chat_id'],
+                ('🚀 Ваша очередь подошла! Начинаем обработку…\n'
+                 f'Запрос {data['keyword']}, {data['from_date']}, '
+                 f'{data['to_date']}.')
+            )
+        fanned_out = await background_parse(data,
+                                            conn,
+                                            redis_client,
+                                            bot,
+                                            client)
+    finally:
+        if not fanned_out:
+            await finish_job(data.get('job_id'))
+
+
 @celery_app.task(name="background_parse")
 def background_parse_task(data: dict):
     """Celery-обёртка для запуска асинхронного парсинга."""
-    async def _async_task():
-        conn = await get_conn()
-        bot = Bot(token=BOT_TOKEN)
-        redis_client = get_redis_client()
-        chat_id = data['chat_id']
-        await remove_user_from_queue(chat_id)
-        await bot.send_message(
-            chat_id,
-            ('🚀 Ваша очередь подошла! Начинаем обработку…\n'
-             f'Запрос {data['keyword']}, {data['from_date']}, '
-             f'{data['to_date']}.')
-        )
+    run_task(start_parse, data)
+
+
+@celery_app.task(name="parse_chunk")
+def parse_chunk_task(data: dict, job: str, message_id: int):
+    run_task(parse_chunk, data, job, message_id)
+
+
+@celery_app.task(name="assemble_results")
+def assemble_results_task(results, data: dict, job: str, message_id: int):
+    run_task(assemble_results, data, job, message_id)
+
+
+@celery_app.task(name="parse_failed")
+def parse_failed_task(request, exc, traceback, data: dict):
+    logging.error(f'Подзадача поиска для {data['user_first_name']} '
+                  f'упала: {exc}')
+
+    async def _notify(conn, redis_client, bot, client):
+        await send_parse_error(data, bot)
+        await finish_job(data.get('job_id'))
+
+    run_task(_notify)
+
+
+async def dispatch_jobs():
+    """
+    Фоновая задача бота: передаёт задания из очереди в Celery,
+    пока есть свободные места по общему и пользовательскому лимиту.
+    """
+    while True:
         try:
-            await background_parse(data,
-                                   conn,
-                                   redis_client,
-                                   bot)
-        finally:
-            await conn.close()
-            await bot.session.close()
-            await redis_client.close()
-            await redis_client.connection_pool.disconnect()
+            await expire_stale_jobs()
+            while (data := await pop_next_job()) is not None:
+                background_parse_task.apply_async(args=[data],
+                                                  task_id=data['job_id'])
+                await add_job_tasks(data['job_id'], [data['job_id']])
+                logging.info(f'Задание {data['job_id']} для '
+                             f'{data['user_first_name']} запущено')
+        except Exception as e:
+            logging.exception(f'Ошибка при разборе очереди: {e}')
+        await asyncio.sleep(c.QUEUE_POLL_INTERVAL)
 
-    asyncio.run(_async_task())
 
+async def cancel_jobs(chat_id: int) -> int:
+    """Снимает задания пользователя и отзывает их задачи Celery."""
+    count, task_ids = await cancel_user_jobs(chat_id)
+    for task_id in task_ids:
+        celery_app.control.revoke(task_id, terminate=True)
+    return count
 
-async def add_user_to_queue(data: dict) -> int:
+
+async def request_partial_results(chat_id: int):
+    """Просит воркер прислать промежуточный файл после текущего года."""
     redis = get_redis_queue()
-    user_name = data['user_first_name']
-    chat_id = data['chat_id']
-    await redis.rpush(c.CELERY_QUEUE_TABLE_NAME,
-                      f"{chat_id}:{user_name}")
-    position = await redis.llen(c.CELERY_QUEUE_TABLE_NAME)
-    await redis.close()
-    await redis.connection_pool.disconnect()
-    return position
+    await redis.set(f'{c.PARTIAL_RESULTS_KEY}:{chat_id}',
+                    1,
+                    ex=c.PARTIAL_RESULTS_TTL)
 
 
-async def remove_user_from_queue(chat_id: int):
+async def pop_partial_request(chat_id: int) -> bool:
     redis = get_redis_queue()
-    queue = await redis.lrange(c.CELERY_QUEUE_TABLE_NAME,
-                               0,
-                               -1)
-    for item in queue:
-        if item.decode().startswith(str(chat_id)):
-            await redis.lrem(c.CELERY_QUEUE_TABLE_NAME,
-                             1,
-                             item)
-            break
-    await redis.close()
-    await redis.connection_pool.disconnect()
+    return bool(await redis.getdel(f'{c.PARTIAL_RESULTS_KEY}:{chat_id}'))
@@ -0,0 +1,100 @@
+import logging
+import os
+import zlib
+from typing import Dict, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_MARKER = b'ZL1:'
+ZSTD_MARKER = b'ZS1:'
+ZSTD_DICT_MARKER = b'ZD1:'
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+ZSTD_DICT_PATH = os.getenv('ZSTD_DICT_PATH')
+
+_stats = {'raw_bytes': 0, 'compressed_bytes': 0}
+
+
+def _load_dictionary():
+    if zstandard is None or not ZSTD_DICT_PATH:
+        return None
+    if not os.path.exists(ZSTD_DICT_PATH):
+        logging.warning(f'Словарь zstd {ZSTD_DICT_PATH} не найден')
+        return None
+    with open(ZSTD_DICT_PATH, 'rb') as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+_dictionary = _load_dictionary()
+if zstandard is not None:
+    _compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL,
+                                           dict_data=_dictionary)
+    _decompressor = zstandard.ZstdDecompressor()
+    _dict_decompressor = (
+        zstandard.ZstdDecompressor(dict_data=_dictionary)
+        if _dictionary is not None else None
+    )
+
+
+def compress(text: str) -> bytes:
+    """
+    Сжимает страницу лучшим доступным кодеком: zstd со словарём,
+    zstd или zlib. Маркер кодека записывается в начало значения.
+    """
+    raw = text.encode('utf-8')
+    if zstandard is not None:
+        marker = ZSTD_DICT_MARKER if _dictionary is not None else ZSTD_MARKER
+        packed = marker + _compressor.compress(raw)
+    else:
+        packed = ZLIB_MARKER + zlib.compress(raw, ZLIB_LEVEL)
+    _stats['raw_bytes'] += len(raw)
+    _stats['compressed_bytes'] += len(packed)
+    return packed
+
+
+def decompress(value: bytes | str) -> str:
+    """Распаковывает значение по маркеру; значения без маркера — как есть."""
+    if isinstance(value, str):
+        return value
+    if value.startswith(ZLIB_MARKER):
+        return zlib.decompress(value[len(ZLIB_MARKER):]).decode('utf-8')
+    if value.startswith(ZSTD_MARKER):
+        return _decompressor.decompress(
+            value[len(ZSTD_MARKER):]
+        ).decode('utf-8')
+    if value.startswith(ZSTD_DICT_MARKER):
+        if _dictionary is None:
+            raise ValueError('Значение сжато со словарём zstd, '
+                             'но словарь не загружен')
+        return _dict_decompressor.decompress(
+            value[len(ZSTD_DICT_MARKER):]
+        ).decode('utf-8')
+    return value.decode('utf-8')
+
+
+def train_dictionary(samples: List[str], size: int = 112640) -> bytes:
+    """Обучает словарь zstd на выборке страниц."""
+    if zstandard is None:
+        raise RuntimeError('Для обучения словаря нужен пакет zstandard')
+    return zstandard.train_dictionary(
+        size,
+        [sample.encode('utf-8') for sample in samples]
+    ).as_bytes()
+
+
+def compression_stats() -> Dict[str, float]:
+    raw, compressed = _stats['raw_bytes'], _stats['compressed_bytes']
+    return {'raw_bytes': raw,
+            'compressed_bytes': compressed,
+            'ratio': raw / compressed if compressed else 0.0}
+
+
+def log_compression_stats():
+    stats = compression_stats()
+    if stats['compressed_bytes']:
+        logging.info(f'Сжатие страниц: {stats['raw_bytes']} → '
+                     f'{stats['compressed_bytes']} байт '
+                     f'(×{stats['ratio']:.1f})')
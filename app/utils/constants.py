@@ -1,3 +1,5 @@
+import os
+
 PERSON = 'https://api.parliament.uk/historic-hansard/people'
 ITEMS_PER_PAGE = 5
 MAIN_URL = 'https://api.parliament.uk'
@@ -14,5 +16,66 @@ FIRST_MONTH_DAY = 1
 LAST_MONTH_DAY = 31
 DATE_RANGE = 11
 DELAY_TIME = 5
-CELERY_QUEUE_TABLE_NAME = 'celery_user_queue'
+# Сортированное множество заданий (раньше — список celery_user_queue).
+CELERY_QUEUE_TABLE_NAME = 'celery_job_queue'
 PERSON_PATTERN = r'https?://api\.parliament\.uk/historic-hansard/people/'
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 20))
+MAX_REQUESTS_PER_HOST = int(os.getenv('MAX_REQUESTS_PER_HOST', 8))
+SITTING_LINK_PATTERN = (r'/historic-hansard/sittings/(\d{4})/'
+                        r'([a-z]{3})(?:/(\d{1,2}))?/?$')
+SITTING_CALENDAR_KEY = 'sitting_calendar'
+NEGATIVE_CACHE_KEY = 'missing'
+NEGATIVE_CACHE_STATS_KEY = 'missing_stats'
+NEGATIVE_CACHE_TTL = 7 * 24 * 60 * 60
+NEGATIVE_CACHE_DB_DAYS = 90
+EXTRACTOR_VERSION = 1
+SITTING_HOUSES = ['commons', 'lords']
+WRITTEN_ANSWERS_HOUSES = ['commons_written_answers', 'lords_written_answers']
+PRECRAWL_MAX_REQUESTS = int(os.getenv('PRECRAWL_MAX_REQUESTS', 4))
+PRECRAWL_REQUESTS_PER_SECOND = float(
+    os.getenv('PRECRAWL_REQUESTS_PER_SECOND', 2)
+)
+PRECRAWL_START_HOUR = int(os.getenv('PRECRAWL_START_HOUR', 1))
+PRECRAWL_END_HOUR = int(os.getenv('PRECRAWL_END_HOUR', 7))
+PRECRAWL_PEOPLE_BATCH = 20
+PROGRESS_INTERVAL = int(os.getenv('PROGRESS_INTERVAL', 30))
+PARTIAL_RESULTS_KEY = 'partial_results'
+PARTIAL_RESULTS_TTL = 60 * 60
+MAX_KEYWORDS = 10
+MAX_SUBTASKS_PER_JOB = int(os.getenv('MAX_SUBTASKS_PER_JOB', 4))
+JOB_PROGRESS_KEY = 'job_progress'
+JOB_PROGRESS_TTL = 24 * 60 * 60
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30))
+HTTP2 = os.getenv('HTTP2', '').lower() in ('1', 'true', 'yes')
+MAX_PAGE_BYTES = int(os.getenv('MAX_PAGE_BYTES', 10 * 1024 * 1024))
+# Через сколько дней страница перепроверяется условным запросом;
+# 0 — никогда (архив Hansard почти не меняется).
+DOCUMENT_MAX_AGE_DAYS = int(os.getenv('DOCUMENT_MAX_AGE_DAYS', 0))
+PAGE_CACHE_TTL = DOCUMENT_MAX_AGE_DAYS * 24 * 60 * 60 or None
+RUNNING_JOBS_KEY = 'running_jobs'
+JOB_KEY = 'job'
+JOB_SEQUENCE_KEY = 'job_sequence'
+QUEUE_ROUND_KEY = 'queue_round'
+USER_ROUNDS_KEY = 'user_rounds'
+# Счёт задания в очереди: раунд * QUEUE_ROUND_SIZE + номер поступления.
+QUEUE_ROUND_SIZE = 10 ** 9
+MAX_RUNNING_JOBS = int(os.getenv('MAX_RUNNING_JOBS', 4))
+MAX_RUNNING_JOBS_PER_USER = int(os.getenv('MAX_RUNNING_JOBS_PER_USER', 1))
+MAX_QUEUED_JOBS_PER_USER = int(os.getenv('MAX_QUEUED_JOBS_PER_USER', 3))
+QUEUE_POLL_INTERVAL = 2
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 6 * 60 * 60))
+JOB_FLIGHT_KEY = 'job_flight'
+JOB_RECIPIENTS_KEY = 'job_recipients'
+ATTACHED_JOBS_KEY = 'attached_jobs'
+FETCH_LOCK_KEY = 'fetch_lock'
+FETCH_LOCK_TTL = int(os.getenv('FETCH_LOCK_TTL', 120))
+FETCH_LOCK_POLL_MIN = 0.05
+FETCH_LOCK_POLL_MAX = 1
+PAGE_L1_MAX_BYTES = int(os.getenv('PAGE_L1_MAX_BYTES', 64 * 1024 * 1024))
+PAGE_L1_TTL = int(os.getenv('PAGE_L1_TTL', 300))
+MP_DIRECTORY_REFRESH_HOURS = float(
+    os.getenv('MP_DIRECTORY_REFRESH_HOURS', 7 * 24)
+)
+MP_FUZZY_LIMIT = 20
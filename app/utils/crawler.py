@@ -0,0 +1,433 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Set, Tuple
+
+import httpx
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+from ..db.db import (DocumentWriter, get_document, get_documents,
+                     get_stale_documents, save_document, touch_documents)
+from ..redis.redis_client import get_many, set_many
+from .compression import compress, decompress
+from .constants import (DELAY_TIME, DOCUMENT_MAX_AGE_DAYS, HTTP2,
+                        HTTP_CONNECT_TIMEOUT, HTTP_KEEPALIVE_EXPIRY,
+                        HTTP_TIMEOUT, MAX_CONCURRENT_REQUESTS,
+                        MAX_PAGE_BYTES, MAX_REQUESTS_PER_HOST, PAGE_CACHE_TTL)
+from .local_cache import page_cache
+from .negative_cache import filter_missing, is_missing, remember_missing
+from .progress import count_pages
+from .single_flight import single_flight
+
+
+# url страниц, не загруженных из-за ошибки (не 404 и не пустой ответ):
+# период с такими пропусками нельзя считать полностью разобранным.
+failed_pages: ContextVar[Set[str] | None] = ContextVar('failed_pages',
+                                                       default=None)
+
+
+@contextmanager
+def track_failed_pages() -> Iterator[Set[str]]:
+    """
+    Собирает url страниц, которые не удалось загрузить
+    или сохранить разобранными внутри блока.
+    """
+    failed: Set[str] = set()
+    token = failed_pages.set(failed)
+    try:
+        yield failed
+    finally:
+        failed_pages.reset(token)
+
+
+def remember_failure(url: str):
+    failed = failed_pages.get()
+    if failed is not None:
+        failed.add(url)
+
+
+class HostLimitedTransport(httpx.AsyncHTTPTransport):
+    """
+    Транспорт httpx с общим лимитом одновременных запросов
+    и отдельным лимитом на каждый хост.
+    При заданном requests_per_second запросы к хосту ещё и разносятся
+    во времени.
+    """
+
+    def __init__(self,
+                 max_requests: int = MAX_CONCURRENT_REQUESTS,
+                 max_requests_per_host: int = MAX_REQUESTS_PER_HOST,
+                 requests_per_second: float | None = None,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self._semaphore = asyncio.Semaphore(max_requests)
+        self._max_requests_per_host = max_requests_per_host
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._interval = 1 / requests_per_second if requests_per_second else 0
+        self._next_request_at: Dict[str, float] = {}
+
+    async def _wait_turn(self, host: str):
+        now = asyncio.get_running_loop().time()
+        request_at = max(now, self._next_request_at.get(host, now))
+        self._next_request_at[host] = request_at + self._interval
+        await asyncio.sleep(request_at - now)
+
+    async def handle_async_request(self, request):
+        host_semaphore = self._host_semaphores.setdefault(
+            request.url.host,
+            asyncio.Semaphore(self._max_requests_per_host)
+        )
+        async with self._semaphore, host_semaphore:
+            if self._interval:
+                await self._wait_turn(request.url.host)
+            return await super().handle_async_request(request)
+
+
+def create_client(
+        max_requests: int = MAX_CONCURRENT_REQUESTS,
+        max_requests_per_host: int = MAX_REQUESTS_PER_HOST,
+        requests_per_second: float | None = None
+        ) -> httpx.AsyncClient:
+    """
+    Создаёт HTTP-клиент для краулера с ограничением конкурентности,
+    keep-alive и, если включено и установлен пакет h2, HTTP/2.
+    """
+    limits = httpx.Limits(max_connections=max_requests,
+                          max_keepalive_connections=max_requests,
+                          keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+    if HTTP2 and h2 is None:
+        logging.warning('HTTP/2 включён, но пакет h2 не установлен')
+    return httpx.AsyncClient(
+        transport=HostLimitedTransport(
+            max_requests=max_requests,
+            max_requests_per_host=max_requests_per_host,
+            requests_per_second=requests_per_second,
+            limits=limits,
+            http2=HTTP2 and h2 is not None
+            ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        follow_redirects=True
+        )
+
+
+class PageTooLarge(Exception):
+    pass
+
+
+async def read_page(client: httpx.AsyncClient,
+                    url: str,
+                    headers: Dict[str, str] | None = None
+                    ) -> Tuple[httpx.Response, str | None]:
+    """
+    Потоковая загрузка страницы: тело читается частями и не может
+    превысить MAX_PAGE_BYTES. Для ответов без тела (304, ошибки)
+    текст — None.
+    """
+    async with client.stream('GET', url, headers=headers) as response:
+        if response.status_code == 304 or response.is_error:
+            # Тело дочитывается, чтобы соединение вернулось в пул.
+            await response.aread()
+            return response, None
+        if int(response.headers.get('content-length') or 0) > MAX_PAGE_BYTES:
+            raise PageTooLarge(url)
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > MAX_PAGE_BYTES:
+                raise PageTooLarge(url)
+    return response, body.decode(response.encoding or 'utf-8',
+                                 errors='replace')
+
+
+async def revalidate_page(client: httpx.AsyncClient,
+                          url: str,
+                          content: str,
+                          etag: str | None,
+                          last_modified: str | None,
+                          conn,
+                          redis_client) -> str:
+    """
+    Перепроверяет устаревшую страницу условным запросом.
+    При 304 отмечает проверку, при новой версии сохраняет её,
+    при ошибке отдаёт сохранённую версию.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        response, text = await read_page(client, url, headers)
+        if response.status_code == 304:
+            logging.info(f'Страница {url} не изменилась')
+            await touch_documents([url], conn)
+        else:
+            response.raise_for_status()
+            if text and text.strip():
+                logging.info(f'Страница {url} обновлена')
+                await save_document(url,
+                                    text,
+                                    conn,
+                                    etag=response.headers.get('etag'),
+                                    last_modified=response.headers.get(
+                                        'last-modified'
+                                    ))
+                content = text
+    except (httpx.HTTPError, httpx.StreamError, PageTooLarge) as e:
+        logging.warning(f'Не удалось перепроверить {url}: {e}')
+    await redis_client.set(url, compress(content), ex=PAGE_CACHE_TTL)
+    return content
+
+
+async def load_once(url: str, redis_client, load) -> str | None:
+    """
+    Загружает страницу не больше одного раза на кластер. Кто ждал
+    чужую загрузку, находит её результат в Redis.
+    """
+    async def load_uncached() -> str | None:
+        cached_page = await redis_client.get(url)
+        if cached_page:
+            logging.info(f'Страница {url} получена из Redis')
+            return decompress(cached_page)
+        return await load()
+
+    return await single_flight(url, redis_client, load_uncached)
+
+
+async def fetch_page(
+        client: httpx.AsyncClient,
+        url: str,
+        data: Dict,
+        conn,
+        redis_client,
+        bot
+        ) -> str | None:
+    """
+    Асинхронная загрузка страницы.
+    Возвращает None, если страница недоступна (404) или ошибка сети.
+    """
+    logging.info(f'Парсим {url} для {data['user_first_name']}')
+    url = url.split('#')[0]
+    count_pages()
+    page = page_cache.get(url)
+    if page is not None:
+        return page
+    cached_page = await redis_client.get(url)
+    if cached_page:
+        logging.info(f'Страница {url} получена из Redis')
+        page = decompress(cached_page)
+    else:
+        page = await load_once(url,
+                               redis_client,
+                               lambda: load_page(client,
+                                                 url,
+                                                 data,
+                                                 conn,
+                                                 redis_client,
+                                                 bot))
+    page_cache.put(url, page)
+    return page
+
+
+async def load_page(
+        client: httpx.AsyncClient,
+        url: str,
+        data: Dict,
+        conn,
+        redis_client,
+        bot
+        ) -> str | None:
+    """
+    Загрузка страницы после промаха Redis:
+    негативный кэш → Postgres → HTTP.
+    """
+    if await is_missing(url, conn, redis_client):
+        logging.info(f'Страница {url} отсутствует (негативный кэш)')
+        return None
+    row = await get_document(url, conn)
+    if row:
+        if DOCUMENT_MAX_AGE_DAYS:
+            stale = await get_stale_documents([url],
+                                              DOCUMENT_MAX_AGE_DAYS,
+                                              conn)
+            if url in stale:
+                return await revalidate_page(client,
+                                             url,
+                                             row,
+                                             *stale[url],
+                                             conn,
+                                             redis_client)
+        await redis_client.set(url, compress(row), ex=PAGE_CACHE_TTL)
+        return row
+    return await download_page(client, url, data, conn, redis_client, bot)
+
+
+async def download_page(
+        client: httpx.AsyncClient,
+        url: str,
+        data: Dict,
+        conn,
+        redis_client,
+        bot,
+        writer: DocumentWriter | None = None
+        ) -> str | None:
+    """
+    Загрузка страницы с сайта с повторными попытками.
+    Сохраняет страницу в Postgres (через writer, если он передан) и Redis.
+    """
+    retries = 3
+    for attempt in range(retries):
+        try:
+            response, text = await read_page(client, url)
+            response.raise_for_status()
+            if not text.strip():
+                logging.warning(f'Пустая страница: {url}, пропускаем')
+                await remember_missing(url,
+                                       response.status_code,
+                                       conn,
+                                       redis_client)
+                return None
+            etag = response.headers.get('etag')
+            last_modified = response.headers.get('last-modified')
+            if writer is not None:
+                await writer.add(url, text, etag, last_modified)
+            else:
+                await save_document(url,
+                                    text,
+                                    conn,
+                                    etag=etag,
+                                    last_modified=last_modified)
+            await redis_client.set(url, compress(text), ex=PAGE_CACHE_TTL)
+            return text
+        except PageTooLarge:
+            logging.warning(f'Страница {url} больше {MAX_PAGE_BYTES} байт, '
+                            'пропускаем')
+            remember_failure(url)
+            return None
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logging.warning(f'404 Not Found: {url}, пропускаем')
+                await remember_missing(url, 404, conn, redis_client)
+                return None
+            else:
+                logging.warning(f'{e.response.status_code}: {url}, '
+                                'пропускаем')
+                remember_failure(url)
+                return None
+        except (httpx.HTTPError, httpx.StreamError) as e:
+            logging.error(f'Сетевая ошибка {e} при запросе {url}')
+            if attempt < retries - 1:
+                await asyncio.sleep(DELAY_TIME)
+            else:
+                if bot is None:
+                    raise
+                if data and 'from_date' in data:
+                    await bot.send_message(data['chat_id'], text=(
+                        'Произошла ошибка при запросе: '
+                        f'{data['from_date']}, {data['to_date']}, '
+                        f'{data['keyword']}\n\n'
+                        'Повторите попытку.'),
+                        )
+                else:
+                    await bot.send_message(data['chat_id'], text=(
+                        'Произошла ошибка при запросе '
+                        'списка персон.'),
+                        )
+                raise
+    return None
+
+
+async def fetch_pages(
+        client: httpx.AsyncClient,
+        urls: List[str],
+        data: Dict,
+        conn,
+        redis_client,
+        bot
+        ) -> List[str | None]:
+    """
+    Загрузка нескольких страниц по той же цепочке, что и fetch_page:
+    память процесса → Redis → негативный кэш → Postgres → HTTP.
+    Redis и Postgres опрашиваются пачкой за один проход, новые страницы
+    пишутся пачками, скачивание идёт конкурентно.
+    Результаты возвращаются в том же порядке, что и urls.
+    """
+    urls = [url.split('#')[0] for url in urls]
+    unique_urls = list(dict.fromkeys(urls))
+    count_pages(len(unique_urls))
+    logging.info(f'Парсим {len(unique_urls)} страниц '
+                 f'для {data['user_first_name']}')
+    pages: Dict[str, str | None] = {}
+    for url in unique_urls:
+        page = page_cache.get(url)
+        if page is not None:
+            pages[url] = page
+    not_local = [url for url in unique_urls if url not in pages]
+    cached_pages = await get_many(redis_client, not_local)
+    pending = []
+    for url, cached_page in zip(not_local, cached_pages):
+        if cached_page:
+            pages[url] = decompress(cached_page)
+        else:
+            pending.append(url)
+    pending = await filter_missing(pending, conn, redis_client)
+    stored = await get_documents(pending, conn)
+    stale = (await get_stale_documents(list(stored),
+                                       DOCUMENT_MAX_AGE_DAYS,
+                                       conn)
+             if DOCUMENT_MAX_AGE_DAYS else {})
+    pages.update(stored)
+    await set_many(redis_client,
+                   {url: compress(content) for url, content in stored.items()
+                    if url not in stale},
+                   ex=PAGE_CACHE_TTL)
+    to_download = [url for url in pending if url not in stored]
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    writer = DocumentWriter(conn)
+
+    async def download_one(url: str):
+        async def download() -> str | None:
+            return await download_page(client,
+                                       url,
+                                       data,
+                                       conn,
+                                       redis_client,
+                                       bot,
+                                       writer)
+
+        # Слот семафора берётся до блокировки в Redis: иначе задачи,
+        # ждущие слота, держат блокировки, и другие процессы зря ждут их.
+        async with semaphore:
+            pages[url] = await load_once(url, redis_client, download)
+
+    async def revalidate_one(url: str):
+        async def revalidate() -> str:
+            return await revalidate_page(client,
+                                         url,
+                                         stored[url],
+                                         *stale[url],
+                                         conn,
+                                         redis_client)
+
+        async with semaphore:
+            pages[url] = await load_once(url, redis_client, revalidate)
+
+    tasks = [asyncio.create_task(download_one(url)) for url in to_download]
+    tasks += [asyncio.create_task(revalidate_one(url)) for url in stale]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        await writer.close()
+    for url in not_local:
+        page_cache.put(url, pages.get(url))
+    return [pages.get(url) for url in urls]
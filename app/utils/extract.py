@@ -0,0 +1,157 @@
+"""
+Точечное извлечение данных со страниц Hansard через XPath lxml.
+Результат совпадает с прежним разбором BeautifulSoup,
+но без построения полного дерева bs4.
+"""
+import re
+from typing import List, NamedTuple, Tuple
+
+from lxml import etree, html
+
+from .constants import SITTING_HOUSES, WRITTEN_ANSWERS_HOUSES
+
+_PARSER = html.HTMLParser(encoding='utf-8')
+# То же выражение вычисляет столбец contributions.speaker_slug.
+SPEAKER_SLUG_PATTERN = '/people/([^/#?]+)'
+_SPEAKER_SLUG = re.compile(SPEAKER_SLUG_PATTERN)
+
+
+def has_class(name: str) -> str:
+    return (f"contains(concat(' ', normalize-space(@class), ' '), "
+            f"' {name} ')")
+
+
+_PEOPLE = etree.XPath(f"//li[{has_class('person')}]")
+_PERSON_YEARS = etree.XPath(f"//span[{has_class('speeches-by-year')}]")
+_PERSON_CONTRIBUTIONS = etree.XPath(
+    f"//p[{has_class('person-contribution')}]"
+)
+_DATE = etree.XPath(f".//span[{has_class('date')}]")
+_HOUSE = etree.XPath('(//h3[@id = $house])[1]/following-sibling::*[1]')
+_LINKS = etree.XPath('.//a[@href]')
+_FIRST_LINK = etree.XPath('.//a[1]')
+_FIRST_SPAN = etree.XPath('.//span[1]')
+_MEMBER_CONTRIBUTIONS = etree.XPath(
+    "//div[@class = 'hentry member_contribution']"
+)
+_SPEECHES = etree.XPath('//blockquote[@cite]')
+_ALL_HREFS = etree.XPath('//a/@href')
+_TEXT_NODES = etree.XPath('.//text()')
+
+
+class Section(NamedTuple):
+    """Ссылка на обсуждение со страницы дня заседаний."""
+    house: str
+    title: str
+    href: str
+
+
+class Speech(NamedTuple):
+    """Выступление: ссылка на персону из cite и текст blockquote."""
+    speaker: str
+    text: str
+
+
+def speaker_slug(speaker: str) -> str | None:
+    """Идентификатор персоны из ссылки cite выступления."""
+    match = _SPEAKER_SLUG.search(speaker)
+    return match.group(1) if match else None
+
+
+class Person(NamedTuple):
+    """Персона из списка на букву."""
+    full_name: str
+    link: str
+    dates: str
+
+
+class PersonContribution(NamedTuple):
+    """Выступление со страницы персоны за год."""
+    date: str
+    title: str
+    href: str
+
+
+def parse_page(page: str):
+    return html.document_fromstring(page.encode('utf-8'), parser=_PARSER)
+
+
+def text_of(element) -> str:
+    """Аналог Tag.text: весь текст элемента без разделителей."""
+    return ''.join(_TEXT_NODES(element))
+
+
+def stripped_text_of(element) -> str:
+    """Аналог Tag.get_text(' ', strip=True)."""
+    return ' '.join(part.strip()
+                    for part in _TEXT_NODES(element)
+                    if part.strip())
+
+
+def extract_links(page: str) -> List[str]:
+    """Все href ссылок страницы."""
+    return [str(href) for href in _ALL_HREFS(parse_page(page))]
+
+
+def extract_people(page: str) -> List[Person]:
+    """Персоны со страницы /people/{буква}."""
+    people = []
+    for person in _PEOPLE(parse_page(page)):
+        links = _FIRST_LINK(person)
+        if not links or links[0].get('href') is None:
+            continue
+        spans = _FIRST_SPAN(person)
+        people.append(Person(text_of(links[0]),
+                             links[0].get('href'),
+                             text_of(spans[0]) if spans else ''))
+    return people
+
+
+def extract_person_years(page: str) -> List[str]:
+    """Ссылки на страницы выступлений персоны по годам."""
+    links = []
+    for year in _PERSON_YEARS(parse_page(page)):
+        first_link = _FIRST_LINK(year)
+        if first_link and first_link[0].get('href') is not None:
+            links.append(first_link[0].get('href'))
+    return links
+
+
+def extract_person_contributions(page: str) -> List[PersonContribution]:
+    """Дата, заголовок и ссылка каждого выступления персоны за год."""
+    contributions = []
+    for contribution in _PERSON_CONTRIBUTIONS(parse_page(page)):
+        links = _FIRST_LINK(contribution)
+        dates = _DATE(contribution)
+        if not links or links[0].get('href') is None or not dates:
+            continue
+        contributions.append(PersonContribution(text_of(dates[0]),
+                                                text_of(links[0]),
+                                                links[0].get('href')))
+    return contributions
+
+
+def extract_day_sections(page: str) -> List[Section]:
+    """Обсуждения палат и ответы на письма со страницы дня заседаний."""
+    tree = parse_page(page)
+    sections = []
+    for house in SITTING_HOUSES + WRITTEN_ANSWERS_HOUSES:
+        for list_tag in _HOUSE(tree, house=house):
+            for link in _LINKS(list_tag):
+                sections.append(Section(house,
+                                        text_of(link),
+                                        link.get('href')))
+    return sections
+
+
+def extract_section(page: str) -> Tuple[str, List[Speech]]:
+    """
+    Текст обсуждения для поиска по всем заседаниям
+    и выступления с указанием персоны для поиска по персоне.
+    """
+    tree = parse_page(page)
+    text = '\n'.join(stripped_text_of(tag)
+                     for tag in _MEMBER_CONTRIBUTIONS(tree))
+    speeches = [Speech(tag.get('cite'), stripped_text_of(tag))
+                for tag in _SPEECHES(tree)]
+    return text, speeches
@@ -0,0 +1,75 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from .constants import PAGE_L1_MAX_BYTES, PAGE_L1_TTL
+
+
+class PageCache:
+    """
+    Кэш страниц в памяти процесса перед Redis: LRU, ограниченный
+    суммарным размером строк в байтах, с временем жизни записей.
+    Горячие страницы (списки персон, страницы лет) не гоняются
+    по сети и не распаковываются заново.
+    """
+
+    def __init__(self,
+                 max_bytes: int = PAGE_L1_MAX_BYTES,
+                 ttl: float = PAGE_L1_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, Tuple[float, int, str]]' = (
+            OrderedDict()
+        )
+
+    def get(self, url: str) -> str | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, page = entry
+        if expires_at <= time.monotonic():
+            self._drop(url)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(url)
+        self.hits += 1
+        return page
+
+    def put(self, url: str, page: str | None):
+        if page is None or not self.max_bytes:
+            return
+        size = sys.getsizeof(page)
+        if size > self.max_bytes:
+            return
+        self._drop(url)
+        self._entries[url] = (time.monotonic() + self.ttl, size, page)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def _drop(self, url: str):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+
+page_cache = PageCache()
@@ -1,15 +1,82 @@
 import os
+from typing import Dict, List
 
 import aiofiles
 
+COPY_CHUNK_SIZE = 64 * 1024
 
-async def save_parsed_data(parsed_data, filename):
+
+def results_path(filename: str) -> str:
     results_dir = os.path.join(os.getcwd(), 'results')
     os.makedirs(results_dir, exist_ok=True)
-    file_path = os.path.join(results_dir, filename)
+    return os.path.join(results_dir, filename)
+
+
+class ResultWriter:
+    """
+    Дописывает найденное в файл по мере поиска.
+    Заголовок с итоговым числом объектов известен только в конце,
+    поэтому тело копится во временных файлах (по одному на ключевое
+    слово) и собирается в finalize. При нескольких словах результаты
+    в файле сгруппированы по словам.
+    Файлы на диске названы по file_id (id задания), а не по имени файла
+    для пользователя: одинаковые имена бывают у разных заданий, которые
+    идут одновременно. При выходе удаляются все файлы писателя, поэтому
+    собранный файл нужно отправить внутри блока async with.
+    """
+
+    def __init__(self, file_id: str, keywords: List[str]):
+        self.file_path = results_path(f'{file_id}.txt')
+        self.partial_path = results_path(f'{file_id}.partial.txt')
+        self.keywords = keywords
+        self.part_paths = {keyword: f'{self.file_path}.{index}.part'
+                           for index, keyword in enumerate(keywords)}
+        self.counts = {keyword: 0 for keyword in keywords}
+        self._files = {}
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    async def __aenter__(self):
+        for keyword, part_path in self.part_paths.items():
+            self._files[keyword] = await aiofiles.open(part_path, 'w',
+                                                       encoding='utf-8')
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for part_file in self._files.values():
+            await part_file.close()
+        for path in [*self.part_paths.values(),
+                     self.partial_path,
+                     self.file_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def write(self, found: Dict[str, List[List[str]]]):
+        for keyword, blocks in found.items():
+            part_file = self._files[keyword]
+            for block in blocks:
+                await part_file.write('\n'.join(block) + "\n\n")
+            self.counts[keyword] += len(blocks)
+            await part_file.flush()
+
+    async def _assemble(self, header: str, file_path: str) -> str:
+        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
+            await f.write(header + "\n\n")
+            for keyword in self.keywords:
+                await self._files[keyword].flush()
+                if len(self.keywords) > 1:
+                    await f.write(f'{keyword}: {self.counts[keyword]}\n\n')
+                async with aiofiles.open(self.part_paths[keyword], 'r',
+                                         encoding='utf-8') as part:
+                    while chunk := await part.read(COPY_CHUNK_SIZE):
+                        await f.write(chunk)
+        return file_path
+
+    async def snapshot(self, header: str) -> str:
+        """Промежуточный файл с тем, что найдено к этому моменту."""
+        return await self._assemble(header, self.partial_path)
 
-    async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-        for block in parsed_data:
-            await f.write('\n'.join(block) + "\n\n")
-    del parsed_data
-    return file_path
+    async def finalize(self, header: str) -> str:
+        return await self._assemble(header, self.file_path)
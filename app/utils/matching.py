@@ -0,0 +1,142 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+def iter_pieces(text: str, separator: str = '\n') -> Iterator[str]:
+    """Части текста между разделителями без построения списка."""
+    start = 0
+    while start <= len(text):
+        end = text.find(separator, start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end]
+        start = end + 1
+
+# Найденное за год: ключевое слово -> строки результата.
+Found = Dict[str, List[List[str]]]
+
+
+def new_found(keywords: List[str]) -> Found:
+    return {keyword: [] for keyword in keywords}
+
+
+def parse_keywords(text: str) -> List[str]:
+    """
+    Ключевые слова из ввода пользователя: через запятую, в верхнем
+    регистре, без повторов. Слово в кавычках ищется только целиком.
+    """
+    keywords = []
+    for part in text.split(','):
+        keyword = ' '.join(part.upper().split())
+        term, whole_word = keyword_term(keyword)
+        if not term:
+            continue
+        keyword = f'"{term}"' if whole_word else term
+        if keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+def keyword_term(keyword: str) -> Tuple[str, bool]:
+    """Разбирает ключевое слово на (текст, искать ли целым словом)."""
+    stripped = keyword.strip('"«»“” ')
+    return stripped, stripped != keyword.strip()
+
+
+def query_keywords(data: Dict) -> List[str]:
+    return data.get('keywords') or [data['keyword']]
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatcher:
+    """
+    Поиск нескольких ключевых слов за один проход автоматом
+    Ахо — Корасик. Части текста сначала проверяет общий регулярный
+    фильтр (он работает на C), и автомат запускается только на частях,
+    где есть хотя бы одно из ещё не найденных слов.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = keywords
+        self.terms = [keyword_term(keyword) for keyword in keywords]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail = [0]
+        self._output: List[List[int]] = [[]]
+        for index, (term, _) in enumerate(self.terms):
+            state = 0
+            for char in term:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append(index)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = (
+                    self._output[next_state] +
+                    self._output[self._fail[next_state]]
+                )
+
+    def _prefilter(self, indexes: Iterable[int]) -> re.Pattern:
+        return re.compile('|'.join(re.escape(self.terms[index][0])
+                                   for index in indexes))
+
+    def _scan(self, text: str, wanted: Set[int]) -> Set[int]:
+        found = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                if index not in wanted or index in found:
+                    continue
+                term, whole_word = self.terms[index]
+                start, end = position - len(term) + 1, position + 1
+                if whole_word and (
+                        (start > 0 and is_word_char(text[start - 1])) or
+                        (end < len(text) and is_word_char(text[end]))):
+                    continue
+                found.add(index)
+        return found
+
+    def find(self, pieces: Iterable[str]) -> List[str]:
+        """
+        Ключевые слова, встретившиеся в частях текста.
+        Поиск заканчивается, как только найдены все слова.
+        """
+        wanted = set(range(len(self.terms)))
+        prefilter = self._prefilter(sorted(wanted))
+        for piece in pieces:
+            piece = piece.upper()
+            if not prefilter.search(piece):
+                continue
+            found = self._scan(piece, wanted)
+            if not found:
+                continue
+            wanted -= found
+            if not wanted:
+                break
+            prefilter = self._prefilter(sorted(wanted))
+        return [keyword for index, keyword in enumerate(self.keywords)
+                if index not in wanted]
+
+
+@lru_cache(maxsize=32)
+def keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Автомат для набора слов строится один раз на процесс."""
+    return KeywordMatcher(list(keywords))
@@ -0,0 +1,125 @@
+import logging
+import re
+import string
+import unicodedata
+from typing import Dict, List, Tuple
+
+import httpx
+
+from ..db.db import (get_mp_directory_letters, is_mp_letter_loaded,
+                     save_mp_directory, search_mp_directory,
+                     search_mp_directory_fuzzy)
+from .constants import MP_DIRECTORY_REFRESH_HOURS, MP_FUZZY_LIMIT, PERSON
+from .crawler import create_client, download_page, fetch_page
+from .extract import Person, extract_people
+
+WORD = re.compile(r"[^\W\d_][\w'-]*")
+DIRECTORY_DATA = {'user_first_name': 'mp_directory', 'chat_id': None}
+
+
+def normalize_name(text: str) -> str:
+    """Верхний регистр без диакритики: «Pérez» и «PEREZ» совпадают."""
+    decomposed = unicodedata.normalize('NFKD', text.strip())
+    return ''.join(char for char in decomposed
+                   if not unicodedata.combining(char)).upper()
+
+
+def surname_of(full_name: str, letter: str) -> str:
+    """
+    Фамилия из полного имени на странице буквы: последнее слово
+    на эту букву до территориального «of …» («Lord Smith of Kelvin»),
+    иначе — во всём имени («Earl of Derby»), иначе последнее слово.
+    """
+    name = normalize_name(full_name)
+    head = name.split(' OF ')[0]
+    for part in (head, name):
+        words = [word for word in WORD.findall(part)
+                 if word.startswith(letter.upper())]
+        if words:
+            return words[-1]
+    words = WORD.findall(head)
+    return words[-1] if words else name
+
+
+async def save_letter(letter: str, people: List[Person], conn):
+    await save_mp_directory(
+        letter,
+        [(person.link,
+          person.full_name,
+          surname_of(person.full_name, letter),
+          person.dates)
+         for person in people],
+        conn
+    )
+
+
+async def refresh_mp_directory(client: httpx.AsyncClient,
+                               conn,
+                               redis_client,
+                               force: bool = False):
+    """
+    Перестраивает справочник по страницам всех букв. Без force
+    пропускает буквы, обновлённые меньше MP_DIRECTORY_REFRESH_HOURS
+    назад. Страницы скачиваются заново, минуя кэши.
+    """
+    fresh = (set() if force else
+             await get_mp_directory_letters(MP_DIRECTORY_REFRESH_HOURS,
+                                            conn))
+    for letter in string.ascii_lowercase:
+        if letter in fresh:
+            continue
+        page = await download_page(client,
+                                   f'{PERSON}/{letter}',
+                                   DIRECTORY_DATA,
+                                   conn,
+                                   redis_client,
+                                   None)
+        if page is None:
+            continue
+        await save_letter(letter, extract_people(page), conn)
+    logging.info('Справочник персон обновлён')
+
+
+def person_item(person: Dict) -> List[str]:
+    return [(f'<a href="{PERSON}/{person['slug']}">'
+             f'{person['full_name']}</a> ({person['dates']})'),
+            person['slug']]
+
+
+async def find_mps(surname: str,
+                   data: Dict,
+                   conn,
+                   redis_client,
+                   bot) -> Tuple[List[List[str]], bool]:
+    """
+    Ищет персон по фамилии в справочнике. Возвращает
+    ([строка, slug] для каждой персоны, найдены ли они только
+    по похожей фамилии). Пока буква не загружена в справочник,
+    её страница разбирается один раз и сохраняется.
+    """
+    letter = surname[0].lower()
+    normalized = normalize_name(surname)
+    if not await is_mp_letter_loaded(letter, conn):
+        async with create_client() as client:
+            page = await fetch_page(client,
+                                    f'{PERSON}/{letter}',
+                                    data,
+                                    conn,
+                                    redis_client,
+                                    bot)
+        if page is None:
+            logging.warning(f'Страница {PERSON}/{letter} '
+                            'не получена, пропускаем')
+            return [], False
+        people = extract_people(page)
+        await save_letter(letter, people, conn)
+        return [person_item({'slug': person.link,
+                             'full_name': person.full_name,
+                             'dates': person.dates})
+                for person in people
+                if normalized in normalize_name(person.full_name)], False
+    rows = await search_mp_directory(normalized, letter, conn)
+    if rows:
+        return [person_item(row) for row in rows], False
+    rows = await search_mp_directory_fuzzy(normalized, MP_FUZZY_LIMIT, conn)
+    return [person_item(row) for row in rows], True
@@ -0,0 +1,156 @@
+from typing import Dict, List, Set
+
+import httpx
+
+from ..db.db import (get_mp_profile, get_mp_profile_years,
+                     get_mp_year_contributions, save_mp_profile,
+                     save_mp_year_contributions, search_mp_titles)
+from .constants import MAIN_URL, PERSON
+from .crawler import fetch_page, fetch_pages
+from .extract import (PersonContribution, extract_person_contributions,
+                      extract_person_years)
+from .matching import (Found, keyword_matcher, keyword_term, new_found,
+                       query_keywords)
+
+
+def year_of_link(link: str) -> int:
+    return int(link.rstrip('/').rsplit('/', 1)[-1])
+
+
+def failed_years(data: Dict, failed_urls: Set[str]) -> Set[int]:
+    """Годы, страницы выступлений персоны за которые не загрузились."""
+    prefix = f'{PERSON}/{data['person_info']}/'
+    return {year_of_link(url) for url in failed_urls
+            if url.startswith(prefix) and url[len(prefix):].isdigit()}
+
+
+def contribution_line(date: str, title: str, href: str) -> List[str]:
+    return [f'{date} {title} – {MAIN_URL}{href}\n']
+
+
+async def person_years(data: Dict,
+                       client: httpx.AsyncClient,
+                       conn,
+                       redis_client,
+                       bot) -> List[int]:
+    """
+    Годы активности персоны из профиля. При первом обращении
+    разбирает страницу персоны и сохраняет профиль.
+    """
+    slug = data['person_info']
+    years = await get_mp_profile(slug, conn)
+    if years is not None:
+        return years
+    page = await fetch_page(client,
+                            f'{PERSON}/{slug}',
+                            data,
+                            conn,
+                            redis_client,
+                            bot)
+    if page is None:
+        return []
+    years = sorted({year_of_link(link)
+                    for link in extract_person_years(page)})
+    await save_mp_profile(slug, years, conn)
+    return years
+
+
+async def load_person_years(data: Dict,
+                            years: List[int],
+                            client: httpx.AsyncClient,
+                            conn,
+                            redis_client,
+                            bot) -> Dict[int, List[PersonContribution]]:
+    """
+    Разбирает страницы персоны за годы, которых ещё нет в профиле,
+    и сохраняет списки выступлений. Возвращает разобранное.
+    """
+    if not years:
+        return {}
+    slug = data['person_info']
+    pages = await fetch_pages(client,
+                              [f'{PERSON}/{slug}/{year}' for year in years],
+                              data,
+                              conn,
+                              redis_client,
+                              bot)
+    contributions = {year: extract_person_contributions(page)
+                     for year, page in zip(years, pages)
+                     if page is not None}
+    await save_mp_year_contributions(slug, contributions, conn)
+    return contributions
+
+
+async def person_contributions(
+        data: Dict,
+        years: List[int],
+        client: httpx.AsyncClient,
+        conn,
+        redis_client,
+        bot
+        ) -> Dict[int, List[PersonContribution]]:
+    """Выступления персоны по годам: из профиля, недостающие — с сайта."""
+    stored = await get_mp_profile_years(data['person_info'], years, conn)
+    contributions = {
+        year: [PersonContribution(row['date'], row['title'], row['href'])
+               for row in rows]
+        for year, rows in (await get_mp_year_contributions(
+            data['person_info'], sorted(stored), conn
+        )).items()
+    }
+    contributions.update(await load_person_years(
+        data,
+        [year for year in years if year not in contributions],
+        client,
+        conn,
+        redis_client,
+        bot
+    ))
+    return contributions
+
+
+async def search_person_headers(data: Dict,
+                                years: List[int],
+                                client: httpx.AsyncClient,
+                                conn,
+                                redis_client,
+                                bot) -> Dict[int, Found]:
+    """
+    Поиск в заголовках выступлений персоны. Годы, уже загруженные
+    в профиль, фильтруются запросом к базе; недостающие годы
+    разбираются один раз, сохраняются и проверяются на месте.
+    """
+    slug = data['person_info']
+    keywords = query_keywords(data)
+    found = {year: new_found(keywords) for year in years}
+    stored = sorted(await get_mp_profile_years(slug, years, conn))
+    for keyword in keywords:
+        term, whole_word = keyword_term(keyword)
+        for row in await search_mp_titles(slug,
+                                          stored,
+                                          term,
+                                          whole_word,
+                                          conn):
+            found[row['year']][keyword].append(
+                contribution_line(row['date'], row['title'], row['href'])
+            )
+    fresh = await load_person_years(data,
+                                    [year for year in years
+                                     if year not in stored],
+                                    client,
+                                    conn,
+                                    redis_client,
+                                    bot)
+    for year, contributions in fresh.items():
+        found[year] = match_headers(data, contributions)
+    return found
+
+
+def match_headers(data: Dict,
+                  contributions: List[PersonContribution]) -> Found:
+    desired_data = new_found(query_keywords(data))
+    matcher = keyword_matcher(tuple(desired_data))
+    for date, title, href in contributions:
+        for keyword in matcher.find([title]):
+            desired_data[keyword].append(contribution_line(date, title, href))
+    return desired_data
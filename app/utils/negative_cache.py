@@ -0,0 +1,70 @@
+import logging
+from typing import Dict, List
+
+from ..db.db import (get_missing_documents, is_document_missing,
+                     save_missing_document)
+from ..redis.redis_client import get_many, set_many
+from .constants import (NEGATIVE_CACHE_DB_DAYS, NEGATIVE_CACHE_KEY,
+                        NEGATIVE_CACHE_STATS_KEY, NEGATIVE_CACHE_TTL)
+
+
+def missing_key(url: str) -> str:
+    return f'{NEGATIVE_CACHE_KEY}:{url}'
+
+
+async def is_missing(url: str, conn, redis_client) -> bool:
+    """
+    Проверяет, что страница уже отдавала 404 или пустой ответ:
+    сначала по Redis, затем по таблице missing_documents.
+    """
+    if await redis_client.get(missing_key(url)):
+        await redis_client.hincrby(NEGATIVE_CACHE_STATS_KEY, 'redis_hits', 1)
+        return True
+    if await is_document_missing(url, NEGATIVE_CACHE_DB_DAYS, conn):
+        await redis_client.set(missing_key(url), 1, ex=NEGATIVE_CACHE_TTL)
+        await redis_client.hincrby(NEGATIVE_CACHE_STATS_KEY, 'db_hits', 1)
+        return True
+    return False
+
+
+async def filter_missing(urls: List[str], conn, redis_client) -> List[str]:
+    """Отбрасывает из списка url, заведомо отсутствующие на сайте."""
+    if not urls:
+        return []
+    flags = await get_many(redis_client,
+                           [missing_key(url) for url in urls])
+    redis_missing = {url for url, flag in zip(urls, flags) if flag}
+    rest = [url for url in urls if url not in redis_missing]
+    db_missing = await get_missing_documents(rest,
+                                             NEGATIVE_CACHE_DB_DAYS,
+                                             conn)
+    await set_many(redis_client,
+                   {missing_key(url): 1 for url in db_missing},
+                   ex=NEGATIVE_CACHE_TTL)
+    if redis_missing:
+        await redis_client.hincrby(NEGATIVE_CACHE_STATS_KEY,
+                                   'redis_hits',
+                                   len(redis_missing))
+    if db_missing:
+        await redis_client.hincrby(NEGATIVE_CACHE_STATS_KEY,
+                                   'db_hits',
+                                   len(db_missing))
+    return [url for url in rest if url not in db_missing]
+
+
+async def remember_missing(url: str, status: int, conn, redis_client):
+    await save_missing_document(url, status, conn)
+    await redis_client.set(missing_key(url), status, ex=NEGATIVE_CACHE_TTL)
+    await redis_client.hincrby(NEGATIVE_CACHE_STATS_KEY, 'stored', 1)
+
+
+async def negative_cache_stats(redis_client) -> Dict[str, int]:
+    stats = await redis_client.hgetall(NEGATIVE_CACHE_STATS_KEY)
+    return {key.decode(): int(value) for key, value in stats.items()}
+
+
+async def log_negative_cache_stats(redis_client):
+    stats = await negative_cache_stats(redis_client)
+    saved = stats.get('redis_hits', 0) + stats.get('db_hits', 0)
+    logging.info(f'Негативный кэш: сэкономлено запросов {saved}, '
+                 f'отсутствующих страниц {stats.get('stored', 0)}')
@@ -1,22 +1,34 @@
-import asyncio
-import gc
-import itertools
 import logging
 import os
+from contextlib import nullcontext
 from pathlib import Path
 import re
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Tuple
 
 
 import httpx
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
 
-from ..db.db import get_document, save_document
-from .constants import (BASE_NO_PESON_URL, DELAY_TIME, FIRST_MONTH_DAY,
-                        ITEMS_PER_PAGE, LAST_MONTH_DAY, MAIN_URL, MONTHS,
-                        PERSON, PERSON_PATTERN)
+from ..db.db import (get_extracted_urls, mark_year_indexed,
+                     search_speaker_texts)
+from .compression import log_compression_stats
+from .constants import (BASE_NO_PESON_URL, EXTRACTOR_VERSION, ITEMS_PER_PAGE,
+                        MAIN_URL, MAX_SUBTASKS_PER_JOB, PERSON_PATTERN)
+from .crawler import create_client, track_failed_pages
+from .extract import PersonContribution, Section, speaker_slug
+from .matching import (Found, iter_pieces, keyword_matcher, keyword_term,
+                       new_found, query_keywords)
+from .mp_directory import find_mps
+from .mp_profiles import (failed_years, person_contributions, person_years,
+                          search_person_headers)
+from .negative_cache import log_negative_cache_stats
+from .progress import count_pages, set_total_years
+from .records import day_sections, section_records
+from .result_cache import cached_years, remember_year
+from .sittings_calendar import sitting_dates
+from .text_search import (index_houses, index_kind, is_range_indexed,
+                          search_indexed_texts)
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -28,376 +40,363 @@ async def get_list_of_mps(surname: str,
                           data: Dict,
                           conn,
                           redis_client,
-                          bot) -> List[List[List[str]]] | str:
-    list_of_mps_url = PERSON + '/' + surname[0].lower()
-    async with httpx.AsyncClient() as client:
-        page = await fetch_page(client,
-                                list_of_mps_url,
-                                data,
-                                conn,
-                                redis_client,
-                                bot)
-    if page is None:
-        logging.warning(f'Страница {list_of_mps_url} '
-                        'не получена, пропускаем')
-        return []
-    soup = BeautifulSoup(page, 'lxml')
-    list_of_mps = soup.find_all('li', {'class': 'person'})
+                          bot) -> Tuple[List[List[List[str]]], bool]:
+    """
+    Персоны с фамилией surname по страницам списка и признак того,
+    что точных совпадений нет и найдены похожие фамилии.
+    """
+    people, similar = await find_mps(surname,
+                                     data,
+                                     conn,
+                                     redis_client,
+                                     bot)
     list_of_desired_mps: List[List] = [[]]
-    for person in list_of_mps:
-        full_name = person.find('a').text
-        if surname in full_name:
-            person_link = person.find('a')['href']
-            person_dates = person.find('span').text
-            person_string = (
-                f'<a href="{PERSON}/{person_link}">{full_name}</a> '
-                f'({person_dates})'
-                )
-            if len(list_of_desired_mps[-1]) == ITEMS_PER_PAGE:
-                list_of_desired_mps.append([[person_string, person_link]])
-            else:
-                list_of_desired_mps[-1].append([person_string, person_link])
-    return list_of_desired_mps
+    for person_string, person_link in people:
+        if len(list_of_desired_mps[-1]) == ITEMS_PER_PAGE:
+            list_of_desired_mps.append([[person_string, person_link]])
+        else:
+            list_of_desired_mps[-1].append([person_string, person_link])
+    return list_of_desired_mps, similar
 
 
-async def fetch_page(
-        client: httpx.AsyncClient,
-        url: str,
+async def parsing_fork(
         data: Dict,
         conn,
         redis_client,
-        bot
-        ) -> str | None:
+        bot,
+        client: httpx.AsyncClient | None = None
+        ) -> AsyncIterator[Tuple[int, Found]]:
     """
-    Асинхронная загрузка страницы.
-    Возвращает None, если страница недоступна (404) или ошибка сети.
+    Асинхронный генератор поиска: отдаёт (год, найденное) по мере
+    обработки каждого года, не накапливая результат в памяти.
+    Без переданного client создаётся свой на время поиска.
+    Год попадает в кэш запроса, только если все его страницы
+    загрузились.
     """
-    logging.info(f'Парсим {url} для {data['user_first_name']}')
-    cached_page = await redis_client.get(url)
-    if cached_page:
-        logging.info(f'Страница {url} получена из Redis')
-        return cached_page.decode('utf-8')
-    retries = 3
-    for attempt in range(retries):
-        try:
-            url = url.split('#')[0]
-            row = await get_document(url, conn)
-            if not row:
-                response = await client.get(
-                    url, timeout=30.0, follow_redirects=True
-                    )
-                response.raise_for_status()
-                await save_document(url, response.text, conn)
-                row = response.text
-            await redis_client.set(url, row)
-            return row
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                logging.warning(f'404 Not Found: {url}, пропускаем')
-                return None
-            else:
-                return None
-        except (httpx.HTTPError, httpx.StreamError) as e:
-            logging.error(f'Сетевая ошибка {e} при запросе {url}')
-            if attempt < retries - 1:
-                await asyncio.sleep(DELAY_TIME)
-            else:
-                if data and 'from_date' in data:
-                    await bot.send_message(data['chat_id'], text=(
-                        'Произошла ошибка при запросе: '
-                        f'{data['from_date']}, {data['to_date']}, '
-                        f'{data['keyword']}\n\n'
-                        'Повторите попытку.'),
-                        )
-                else:
-                    await bot.send_message(data['chat_id'], text=(
-                        'Произошла ошибка при запросе '
-                        'списка персон.'),
-                        )
-                raise
-    return None
-
-
-async def parsing_fork(data: Dict, conn, redis_client, bot):
-    result = [[f'По ключевому слову "{data["keyword"]}" найдено объектов: ']]
     logging.info(f'Начинаем парсить по {data}')
-    async with httpx.AsyncClient() as client:
-        if 'person_info' in data.keys():
-            result.extend(await person_parsing(data,
-                                               client,
-                                               conn,
-                                               redis_client,
-                                               bot))
+    async with (create_client() if client is None
+                else nullcontext(client)) as client:
+        cached = {}
+        if await is_range_indexed(data, conn):
+            search = ((year, found, True) async for year, found
+                      in search_indexed_texts(data, conn))
         else:
-            result.extend(await no_person_parsing(data,
-                                                  client,
-                                                  conn,
-                                                  redis_client,
-                                                  bot))
-    return await setting_file_headers(result, data)
-
-
-async def setting_file_headers(result: List[List[str]], data: Dict):
-    count_result = len(result) - 1
-    result[0][0] += str(count_result)
+            cached = await cached_years(data, conn)
+            if cached:
+                logging.info(f'В кэше запроса уже есть лет: {len(cached)}')
+            if 'person_info' in data.keys():
+                search = person_parsing(data,
+                                        cached,
+                                        client,
+                                        conn,
+                                        redis_client,
+                                        bot)
+            else:
+                search = no_person_parsing(data,
+                                           cached,
+                                           client,
+                                           conn,
+                                           redis_client,
+                                           bot)
+        async for year, found, complete in search:
+            if year not in cached and complete:
+                await remember_year(data, year, found, conn)
+            yield year, found
+    await log_negative_cache_stats(redis_client)
+    log_compression_stats()
+
+
+async def plan_year_chunks(data: Dict, conn) -> List[Tuple[int, int]]:
+    """
+    Делит ещё не посчитанные годы поиска на не более чем
+    MAX_SUBTASKS_PER_JOB непрерывных отрезков (с, по) для подзадач.
+    Пустой список — поиск выгоднее выполнить одной задачей:
+    весь период активности персоны, ответ по индексу или меньше
+    двух непосчитанных лет.
+    """
+    if data['from_date'] == '0' or await is_range_indexed(data, conn):
+        return []
+    cached = await cached_years(data, conn)
+    years = [year for year in range(int(data['from_date']),
+                                    int(data['to_date']) + 1)
+             if year not in cached]
+    if len(years) < 2:
+        return []
+    count = min(MAX_SUBTASKS_PER_JOB, len(years))
+    size, rest = divmod(len(years), count)
+    chunks, start = [], 0
+    for index in range(count):
+        end = start + size + (index < rest)
+        chunks.append((years[start], years[end - 1]))
+        start = end
+    return chunks
+
+
+def result_header(data: Dict, count: int) -> str:
+    keywords = query_keywords(data)
+    if len(keywords) > 1:
+        header = (f'По ключевым словам {', '.join(keywords)} '
+                  'найдено объектов: ')
+    else:
+        term, whole_word = keyword_term(keywords[0])
+        header = (f'По ключевому слову "{term}"'
+                  f'{' целиком' if whole_word else ''} найдено объектов: ')
+    header += str(count)
     if 'person_info' in data.keys():
         name = ' '.join(data['person_info'].split('-')).title()
-        result[0][0] += f'; по персоне {name}'
+        header += f'; по персоне {name}'
     elif 'writings' in data.keys():
-        result[0][0] += '; по письмам'
+        header += '; по письмам'
     else:
-        result[0][0] += '; по заседаниям'
+        header += '; по заседаниям'
     if data['from_date'] != '0' and data['to_date'] != '0':
-        result[0][0] += (f'; за период с {data['from_date']} '
-                         f'по {data['to_date']}')
+        header += (f'; за период с {data['from_date']} '
+                   f'по {data['to_date']}')
     else:
-        result[0][0] += '; за весь период активности персоны.'
+        header += '; за весь период активности персоны.'
+    return header
+
+
+def result_filename(data: Dict) -> str:
+    keyword = '_'.join(keyword_term(keyword)[0].replace(' ', '-')
+                       for keyword in query_keywords(data))
     if 'person_info' in data.keys():
-        filename = (f'{data['person_info']}.{data['keyword']}.'
-                    f'{data['from_date']}.{data['to_date']}.txt')
-    elif 'writings' in data.keys():
-        filename = (f'{data['keyword']}.writings.'
-                    f'{data['from_date']}.{data['to_date']}.txt')
-    else:
-        filename = (f'{data['keyword']}.sittings.'
-                    f'{data['from_date']}.{data['to_date']}.txt')
-    gc.collect()
-    return result, filename
+        return (f'{data['person_info']}.{keyword}.'
+                f'{data['from_date']}.{data['to_date']}.txt')
+    if 'writings' in data.keys():
+        return (f'{keyword}.writings.'
+                f'{data['from_date']}.{data['to_date']}.txt')
+    return (f'{keyword}.sittings.'
+            f'{data['from_date']}.{data['to_date']}.txt')
 
 
-async def person_parsing(data: Dict,
-                         client: httpx.AsyncClient,
-                         conn,
-                         redis_client,
-                         bot) -> List:
-    result = []
-    page = await fetch_page(client,
-                            f'{PERSON}/{data['person_info']}',
-                            data,
-                            conn,
-                            redis_client,
-                            bot)
-    primordial_soup = BeautifulSoup(page, 'lxml')
-    if primordial_soup:
-        years = primordial_soup.find_all('span', {'class': 'speeches-by-year'})
-    else:
-        return result
-    del primordial_soup
-    gc.collect()
-    if years:
-        if data['from_date'] == '0' and data['to_date'] == '0':
-            for year in years:
-                link_to_year = f'{MAIN_URL}{year.find('a')['href']}'
-                if data['way'] == 'in_headers':
-                    result += await parse_headers_with_person(
-                        data,
-                        link_to_year,
-                        client,
-                        conn,
-                        redis_client,
-                        bot
-                        )
-                elif data['way'] == 'in_texts':
-                    result += await parse_texts_with_person(
-                        data,
-                        link_to_year,
-                        client,
-                        conn,
-                        redis_client,
-                        bot
-                        )
+async def person_parsing(
+        data: Dict,
+        cached: Dict[int, Found],
+        client: httpx.AsyncClient,
+        conn,
+        redis_client,
+        bot
+        ) -> AsyncIterator[Tuple[int, Found, bool]]:
+    """
+    Поиск по выступлениям персоны. Годы активности и списки
+    выступлений берутся из профиля персоны и догружаются
+    в него при первом обращении. Отдаёт (год, найденное,
+    загрузились ли все страницы года).
+    """
+    years = await person_years(data, client, conn, redis_client, bot)
+    if not years:
+        return
+    if data['from_date'] != '0' or data['to_date'] != '0':
+        years = [year for year in years
+                 if int(data['from_date']) <= year <= int(data['to_date'])]
+    set_total_years(len(years))
+    to_search = [year for year in years if year not in cached]
+    with track_failed_pages() as failed:
+        if data['way'] == 'in_headers':
+            found_by_year = await search_person_headers(data,
+                                                        to_search,
+                                                        client,
+                                                        conn,
+                                                        redis_client,
+                                                        bot)
         else:
-            for year in range(int(data['from_date']),
-                              int(data['to_date']) + 1):
-                link_to_year = f'{PERSON}/{data['person_info']}/{year}'
-                if data['way'] == 'in_headers':
-                    result += await parse_headers_with_person(
-                        data,
-                        link_to_year,
-                        client,
-                        conn,
-                        redis_client,
-                        bot
-                        )
-                elif data['way'] == 'in_texts':
-                    result += await parse_texts_with_person(
-                        data,
-                        link_to_year,
-                        client,
-                        conn,
-                        redis_client,
-                        bot
-                        )
-    return result
+            contributions = await person_contributions(data,
+                                                       to_search,
+                                                       client,
+                                                       conn,
+                                                       redis_client,
+                                                       bot)
+    incomplete = failed_years(data, failed)
+    for year in years:
+        if year in cached:
+            yield year, cached[year], True
+        elif data['way'] == 'in_headers':
+            yield year, found_by_year[year], year not in incomplete
+        else:
+            with track_failed_pages() as failed:
+                found = await parse_texts_with_person(
+                    data,
+                    year,
+                    contributions.get(year, []),
+                    client,
+                    conn,
+                    redis_client,
+                    bot
+                )
+            yield year, found, year not in incomplete and not failed
 
 
-async def no_person_parsing(data: Dict,
-                            client: httpx.AsyncClient,
-                            conn,
-                            redis_client,
-                            bot) -> List:
-    result = []
-    for year in range(int(data['from_date']), int(data['to_date']) + 1):
-        for month in MONTHS:
-            for day in range(FIRST_MONTH_DAY, LAST_MONTH_DAY + 1):
-                link_to_day = f'{BASE_NO_PESON_URL}/{year}/{month}/{day}'
-                page = await fetch_page(client,
-                                        link_to_day,
-                                        data,
-                                        conn,
-                                        redis_client,
-                                        bot)
-                if page is None:
-                    continue
-                soup = BeautifulSoup(page, 'lxml')
-                if 'writings' in data.keys():
-                    commons_tag = soup.find(
-                        'h3',
-                        {'id': 'commons_written_answers'}
-                        )
-                    lords_tag = soup.find(
-                        'h3',
-                        {'id': 'lords_written_answers'}
-                    )
-                else:
-                    commons_tag = soup.find(
-                        'h3',
-                        {'id': 'commons'}
-                        )
-                    lords_tag = soup.find(
-                        'h3',
-                        {'id': 'lords'}
-                    )
-                if commons_tag:
-                    ol_commons_tag = commons_tag.find_next_sibling()
-                    commons_answers = ol_commons_tag.find_all('a')
-                else:
-                    commons_answers = []
-                if lords_tag:
-                    ol_lords_tag = lords_tag.find_next_sibling()
-                    lords_answers = ol_lords_tag.find_all('a')
-                else:
-                    lords_answers = []
-                del soup
-                gc.collect()
-                commons_lords = list(itertools.chain(commons_answers,
-                                                     lords_answers))
-                if data['way'] == 'in_headers':
-                    result += await parse_headers_without_person(
-                        data,
-                        commons_lords,
-                        year,
-                        month,
-                        day
-                        )
-                elif data['way'] == 'in_texts':
-                    result += await parse_texts_without_person(
-                        data,
-                        commons_lords,
-                        year,
-                        month,
-                        day,
-                        client,
-                        conn,
-                        redis_client,
-                        bot
-                        )
+async def no_person_parsing(
+        data: Dict,
+        cached: Dict[int, Found],
+        client: httpx.AsyncClient,
+        conn,
+        redis_client,
+        bot
+        ) -> AsyncIterator[Tuple[int, Found, bool]]:
+    """
+    Поиск по всем заседаниям: отдаёт (год, найденное, загрузились ли
+    все страницы года).
+    """
+    houses = index_houses(data)
+    from_year, to_year = int(data['from_date']), int(data['to_date'])
+    set_total_years(to_year - from_year + 1)
+    for year in range(from_year, to_year + 1):
+        if year in cached:
+            yield year, cached[year], True
+            continue
+        with track_failed_pages() as failed:
+            result = await parse_year_without_person(data,
+                                                     year,
+                                                     houses,
+                                                     client,
+                                                     conn,
+                                                     redis_client,
+                                                     bot)
+        if failed:
+            logging.warning(f'{year}: не загружено или не сохранено '
+                            f'страниц {len(failed)}, '
+                            'год не отмечается в индексе')
+        elif data['way'] == 'in_texts':
+            await mark_year_indexed(year,
+                                    index_kind(data),
+                                    EXTRACTOR_VERSION,
+                                    conn)
+        yield year, result, not failed
+
+
+async def parse_year_without_person(data: Dict,
+                                   year: int,
+                                   houses: List[str],
+                                   client: httpx.AsyncClient,
+                                   conn,
+                                   redis_client,
+                                   bot) -> Found:
+    result = new_found(query_keywords(data))
+    days = [(f'{BASE_NO_PESON_URL}/{year}/{month}/{day}',
+             year,
+             month,
+             day)
+            for month, day in await sitting_dates(year,
+                                                  client,
+                                                  data,
+                                                  conn,
+                                                  redis_client,
+                                                  bot)]
+    sections_by_day = await day_sections(days,
+                                         client,
+                                         data,
+                                         conn,
+                                         redis_client,
+                                         bot)
+    for day_url, _, month, day in days:
+        if day_url not in sections_by_day:
+            continue
+        commons_lords = [section for section in sections_by_day[day_url]
+                         if section.house in houses]
+        if data['way'] == 'in_headers':
+            found = await parse_headers_without_person(
+                data,
+                commons_lords,
+                year,
+                month,
+                day
+                )
+        else:
+            found = await parse_texts_without_person(
+                data,
+                commons_lords,
+                year,
+                month,
+                day,
+                client,
+                conn,
+                redis_client,
+                bot
+                )
+        for keyword, blocks in found.items():
+            result[keyword] += blocks
     return result
 
 
-
-async def parse_headers_with_person(data: Dict,
-                                    link_to_year: str,
-                                    client: httpx.AsyncClient,
-                                    conn,
-                                    redis_client,
-                                    bot):
-    desired_data = []
-    page = await fetch_page(client,
-                            link_to_year,
-                            data,
-                            conn,
-                            redis_client,
-                            bot)
-    if page is None:
-        return desired_data
-    soup = BeautifulSoup(page, 'lxml')
-    contributions = soup.find_all('p', {'class': 'person-contribution'})
-
-    del soup
-    gc.collect()
-    for contribution in contributions:
-        title = contribution.find('a')
-        date = contribution.find('span', {'class': 'date'}).text
-        if data['keyword'] in title.text.upper():
-            desired_data.append([f'{date} {title.text} – '
-                                f'{MAIN_URL}{title['href']}\n'])
-    return desired_data
-
-
 async def parse_texts_with_person(data: Dict,
-                                  link_to_year: str,
+                                  year: int,
+                                  contributions: List[PersonContribution],
                                   client: httpx.AsyncClient,
                                   conn,
                                   redis_client,
-                                  bot):
-    desired_data = []
-    page = await fetch_page(client,
-                            link_to_year,
-                            data,
-                            conn,
-                            redis_client,
-                            bot)
-    if page is None:
-        return desired_data 
-    soup = BeautifulSoup(page, 'lxml')
-    contributions = soup.find_all('p', {'class': 'person-contribution'})
-    del soup
-    gc.collect()
-    for contribution in contributions:
-        title = contribution.find('a')
-        date = contribution.find('span', {'class': 'date'}).text
-        sub_page = await fetch_page(client,
-                                    f'{MAIN_URL}{title["href"]}',
+                                  bot) -> Found:
+    """
+    Поиск в выступлениях персоны за год. Уже разобранные обсуждения
+    проверяются запросом к индексу выступлений по персоне,
+    остальные загружаются, разбираются и сохраняются в него.
+    """
+    keywords = query_keywords(data)
+    desired_data = new_found(keywords)
+    if not contributions:
+        return desired_data
+    person_id = data['person_info']
+    links = [f'{MAIN_URL}{contribution.href}'
+             for contribution in contributions]
+    # Ссылки на выступления ведут на якорь внутри страницы обсуждения,
+    # а страницы в индексе хранятся без него.
+    page_urls = list(dict.fromkeys(link.split('#')[0] for link in links))
+    indexed = await get_extracted_urls(page_urls, EXTRACTOR_VERSION, conn)
+    count_pages(len(indexed))
+    matched = {keyword: set() for keyword in keywords}
+    for keyword in keywords:
+        term, whole_word = keyword_term(keyword)
+        matched[keyword] = await search_speaker_texts(person_id,
+                                                      year,
+                                                      list(indexed),
+                                                      term,
+                                                      whole_word,
+                                                      conn)
+    records = await section_records([url for url in page_urls
+                                     if url not in indexed],
+                                    client,
                                     data,
                                     conn,
                                     redis_client,
-                                    bot)
-        if sub_page is None:
-            continue
-        sub_soup = BeautifulSoup(sub_page, 'lxml')
-        person_id = data['person_info']
-        persons_speeches = sub_soup.find_all('blockquote')
-        sitting_text = ''
-        for speech in persons_speeches:
-            sitting_text += await parse_contribution(speech, person_id)
-        if data['keyword'] in sitting_text:
-            desired_data.append([f'{date} {title.text} – '
-                                f'{MAIN_URL}{title['href']}\n'])
-    del sitting_text
-    del sub_soup
+                                    bot,
+                                    with_speeches=True)
+    matcher = keyword_matcher(tuple(keywords))
+    for url, (_, speeches) in records.items():
+        for keyword in matcher.find(speech.text for speech in speeches
+                                    if speaker_slug(speech.speaker) ==
+                                    person_id):
+            matched[keyword].add(url)
+    for contribution, link in zip(contributions, links):
+        for keyword in keywords:
+            if link.split('#')[0] in matched[keyword]:
+                desired_data[keyword].append([f'{contribution.date} '
+                                              f'{contribution.title} – '
+                                              f'{link}\n'])
     return desired_data
 
 
 async def parse_headers_without_person(
                             data: Dict,
-                            commons_lords: list,
+                            commons_lords: List[Section],
                             year: int,
                             month: str,
                             day: int,
-                            ):
-    desired_data = []
+                            ) -> Found:
+    desired_data = new_found(query_keywords(data))
+    matcher = keyword_matcher(tuple(desired_data))
     logging.info(f'Парсим {year}/{month}/{day}')
     for item in commons_lords:
-        if data['keyword'] in item.text.upper():
-            desired_data.append([f'{year}.{month}.{day} {item.text} – '
-                                 f'{MAIN_URL}{item['href']}'])
+        for keyword in matcher.find([item.title]):
+            desired_data[keyword].append([f'{year}.{month}.{day} '
+                                          f'{item.title} – '
+                                          f'{MAIN_URL}{item.href}'])
     return desired_data
 
 
 async def parse_texts_without_person(
                             data: Dict,
-                            commons_lords: List,
+                            commons_lords: List[Section],
                             year: int,
                             month: str,
                             day: int,
@@ -405,40 +404,23 @@ async def parse_texts_without_person(
                             conn,
                             redis_client,
                             bot
-                            ):
-    desired_data = []
+                            ) -> Found:
+    desired_data = new_found(query_keywords(data))
+    matcher = keyword_matcher(tuple(desired_data))
     logging.info(f'Парсим {year}/{month}/{day}')
-    for item in commons_lords:
-        page = await fetch_page(client,
-                                f'{MAIN_URL}{item["href"]}',
-                                data,
-                                conn,
-                                redis_client,
-                                bot)
-        if page is None:
+    links = [f'{MAIN_URL}{item.href}' for item in commons_lords]
+    records = await section_records(links,
+                                    client,
+                                    data,
+                                    conn,
+                                    redis_client,
+                                    bot)
+    for item, link in zip(commons_lords, links):
+        if link not in records:
             continue
-        soup = BeautifulSoup(page, 'lxml')
-        item_text = await parse_sitting(soup)
-        del soup
-        gc.collect()
-        if data['keyword'] in item_text:
-            desired_data.append([f'{year}.{month}.{day} {item.text} – '
-                                 f'{MAIN_URL}{item['href']}'])
+        item_text, _ = records[link]
+        for keyword in matcher.find(iter_pieces(item_text)):
+            desired_data[keyword].append([f'{year}.{month}.{day} '
+                                          f'{item.title} – '
+                                          f'{MAIN_URL}{item.href}'])
     return desired_data
-
-
-async def parse_sitting(sub_soup):
-    sitting_text = ''
-    sitting_text_tags = sub_soup.find_all(
-            'div',
-            {'class': 'hentry member_contribution'}
-            )
-    for tag in sitting_text_tags:
-        sitting_text += tag.get_text(' ', strip=True).upper()
-    return sitting_text
-
-
-async def parse_contribution(speech, person_id):
-    if 'cite' in speech.attrs and person_id in speech['cite']:
-        return speech.get_text(' ', strip=True).upper()
-    return ''
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import string
+from datetime import datetime, timedelta
+
+import httpx
+
+from ..db.db import (get_checkpoint, get_coverage, mark_year_indexed,
+                     save_checkpoint)
+from .constants import (BASE_NO_PESON_URL, EXTRACTOR_VERSION, MAIN_URL,
+                        MONTHS, PERSON, PRECRAWL_END_HOUR,
+                        PRECRAWL_PEOPLE_BATCH, PRECRAWL_START_HOUR)
+from .crawler import fetch_page, fetch_pages, track_failed_pages
+from .extract import extract_people, extract_person_years
+from .mp_directory import save_letter
+from .records import day_sections, section_records
+from .sittings_calendar import sitting_dates
+
+CRAWLER_DATA = {'user_first_name': 'precrawl', 'chat_id': None}
+SITTINGS_CHECKPOINT = 'sittings'
+PEOPLE_CHECKPOINT = 'people'
+
+
+def sittings_checkpoint(from_year: int, to_year: int) -> str:
+    """Чекпоинт обхода заседаний свой для каждого периода."""
+    return f'{SITTINGS_CHECKPOINT}:{from_year}-{to_year}'
+
+
+def is_off_peak(now: datetime) -> bool:
+    if PRECRAWL_START_HOUR <= PRECRAWL_END_HOUR:
+        return PRECRAWL_START_HOUR <= now.hour < PRECRAWL_END_HOUR
+    return now.hour >= PRECRAWL_START_HOUR or now.hour < PRECRAWL_END_HOUR
+
+
+async def wait_for_off_peak(anytime: bool):
+    """Ждёт начала окна обхода, если обход ограничен ночными часами."""
+    now = datetime.now()
+    if anytime or is_off_peak(now):
+        return
+    start = now.replace(hour=PRECRAWL_START_HOUR,
+                        minute=0,
+                        second=0,
+                        microsecond=0)
+    if start <= now:
+        start += timedelta(days=1)
+    logging.info(f'Предобход приостановлен до {start}')
+    await asyncio.sleep((start - now).total_seconds())
+
+
+async def crawl_sittings(from_year: int,
+                         to_year: int,
+                         client: httpx.AsyncClient,
+                         conn,
+                         redis_client,
+                         anytime: bool = False):
+    """
+    Обходит заседания по годам и месяцам, разбирая дни и обсуждения.
+    Чекпоинт «год/месяц» пишется после каждого месяца и хранится
+    отдельно для каждого периода from_year–to_year. Незаконченный год
+    после перезапуска проходится с января: разобранные страницы берутся
+    из Postgres, а год отмечается в индексе, только если в нём
+    не осталось незагруженных страниц.
+    """
+    checkpoint_name = sittings_checkpoint(from_year, to_year)
+    checkpoint = await get_checkpoint(checkpoint_name, conn)
+    start_year = from_year
+    if checkpoint:
+        year, month = checkpoint.split('/')
+        if from_year <= int(year) <= to_year:
+            start_year = int(year) + (month == MONTHS[-1])
+            logging.info(f'Продолжаем обход заседаний после {checkpoint}')
+    for year in range(start_year, to_year + 1):
+        with track_failed_pages() as failed:
+            await crawl_sittings_year(year,
+                                      client,
+                                      conn,
+                                      redis_client,
+                                      checkpoint_name,
+                                      anytime)
+        if failed:
+            logging.warning(f'Предобход: {year} разобран не полностью '
+                            '(не загружено или не сохранено страниц: '
+                            f'{len(failed)}), '
+                            'в индекс не отмечается')
+            continue
+        for kind in ('sittings', 'writings'):
+            await mark_year_indexed(year, kind, EXTRACTOR_VERSION, conn)
+
+
+async def crawl_sittings_year(year: int,
+                              client: httpx.AsyncClient,
+                              conn,
+                              redis_client,
+                              checkpoint_name: str,
+                              anytime: bool):
+    dates = await sitting_dates(year,
+                                client,
+                                CRAWLER_DATA,
+                                conn,
+                                redis_client,
+                                None)
+    for month in MONTHS:
+        await wait_for_off_peak(anytime)
+        days = [(f'{BASE_NO_PESON_URL}/{year}/{month}/{day}',
+                 year,
+                 month,
+                 day)
+                for date_month, day in dates if date_month == month]
+        sections_by_day = await day_sections(days,
+                                             client,
+                                             CRAWLER_DATA,
+                                             conn,
+                                             redis_client,
+                                             None)
+        for sections in sections_by_day.values():
+            await section_records(
+                [f'{MAIN_URL}{section.href}' for section in sections],
+                client,
+                CRAWLER_DATA,
+                conn,
+                redis_client,
+                None
+                )
+        await save_checkpoint(checkpoint_name,
+                              f'{year}/{month}',
+                              conn)
+        logging.info(f'Предобход: {year}/{month} готов')
+
+
+async def crawl_people(client: httpx.AsyncClient,
+                       conn,
+                       redis_client,
+                       anytime: bool = False):
+    """
+    Обходит персон по буквам: страницы персон и их страницы по годам.
+    Чекпоинт «буква:число обработанных персон».
+    """
+    checkpoint = await get_checkpoint(PEOPLE_CHECKPOINT, conn)
+    done_letter, done_count = '', 0
+    if checkpoint:
+        done_letter, count = checkpoint.split(':')
+        done_count = int(count)
+        logging.info(f'Продолжаем обход персон после {checkpoint}')
+    for letter in string.ascii_lowercase:
+        if letter < done_letter:
+            continue
+        page = await fetch_page(client,
+                                f'{PERSON}/{letter}',
+                                CRAWLER_DATA,
+                                conn,
+                                redis_client,
+                                None)
+        if page is None:
+            continue
+        people = extract_people(page)
+        await save_letter(letter, people, conn)
+        slugs = [person.link for person in people]
+        start = done_count if letter == done_letter else 0
+        for batch_start in range(start, len(slugs), PRECRAWL_PEOPLE_BATCH):
+            await wait_for_off_peak(anytime)
+            batch = slugs[batch_start:batch_start + PRECRAWL_PEOPLE_BATCH]
+            person_pages = await fetch_pages(
+                client,
+                [f'{PERSON}/{slug}' for slug in batch],
+                CRAWLER_DATA,
+                conn,
+                redis_client,
+                None
+                )
+            year_links = []
+            for person_page in person_pages:
+                if person_page is None:
+                    continue
+                year_links += [f'{MAIN_URL}{year}'
+                               for year in extract_person_years(person_page)]
+            await fetch_pages(client,
+                              year_links,
+                              CRAWLER_DATA,
+                              conn,
+                              redis_client,
+                              None)
+            await save_checkpoint(PEOPLE_CHECKPOINT,
+                                  f'{letter}:{batch_start + len(batch)}',
+                                  conn)
+        logging.info(f'Предобход: персоны на {letter.upper()} готовы')
+
+
+async def log_coverage(from_year: int, to_year: int, conn):
+    """Печатает покрытие корпуса по годам."""
+    for row in await get_coverage(from_year, to_year, MAIN_URL, conn):
+        logging.info(
+            f'{row['year']}: дней {row['extracted_days']}/'
+            f'{row['sitting_days']}, обсуждений '
+            f'{row['extracted_sections']}/{row['sections']}'
+            f'{', в индексе' if row['indexed'] else ''}'
+        )
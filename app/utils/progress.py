@@ -0,0 +1,77 @@
+import time
+from contextvars import ContextVar
+from typing import Dict
+
+
+class Progress:
+    """Ход поиска: годы, просмотренные страницы, найденное и оценка времени."""
+
+    def __init__(self, total_years: int = 0, started_at: float | None = None):
+        self.total_years = total_years
+        self.years_done = 0
+        self.pages = 0
+        self.matches = 0
+        # Время по часам, а не monotonic: ход поиска, разбитого
+        # на подзадачи, собирается из разных процессов.
+        self.started_at = started_at or time.time()
+        self._reported_at = time.time()
+
+    @classmethod
+    def restore(cls, stats: Dict[str, float]) -> 'Progress':
+        """Ход поиска по счётчикам, накопленным подзадачами."""
+        progress = cls(int(stats.get('total', 0)), stats.get('started_at'))
+        progress.years_done = int(stats.get('years_done', 0))
+        progress.pages = int(stats.get('pages', 0))
+        progress.matches = int(stats.get('matches', 0))
+        return progress
+
+    def add_pages(self, count: int):
+        self.pages += count
+
+    def year_done(self, matches: int):
+        self.years_done += 1
+        self.matches += matches
+
+    def eta(self) -> float | None:
+        """Оставшееся время в секундах по средней скорости на год."""
+        if not self.years_done or not self.total_years:
+            return None
+        elapsed = time.time() - self.started_at
+        left = max(self.total_years - self.years_done, 0)
+        return elapsed / self.years_done * left
+
+    def is_report_due(self, interval: float) -> bool:
+        """Пора ли обновить сообщение о ходе поиска."""
+        now = time.time()
+        if now - self._reported_at < interval:
+            return False
+        self._reported_at = now
+        return True
+
+    def text(self, finished: bool = False) -> str:
+        total = self.total_years or '?'
+        mark = '✅' if finished else '⏳'
+        lines = [f'{mark} Обработано лет: {self.years_done} из {total}',
+                 f'Просмотрено страниц: {self.pages}',
+                 f'Найдено: {self.matches}']
+        eta = self.eta()
+        if not finished and eta:
+            lines.append(f'Осталось примерно: {max(round(eta / 60), 1)} мин')
+        return '\n'.join(lines)
+
+
+current_progress: ContextVar[Progress | None] = ContextVar('current_progress',
+                                                           default=None)
+
+
+def count_pages(count: int = 1):
+    """Учитывает просмотренные страницы текущего поиска, если он идёт."""
+    progress = current_progress.get()
+    if progress is not None:
+        progress.add_pages(count)
+
+
+def set_total_years(total: int):
+    progress = current_progress.get()
+    if progress is not None:
+        progress.total_years = total
@@ -0,0 +1,94 @@
+from typing import Dict, List, Tuple
+
+import httpx
+
+from ..db.db import (get_contributions, get_day_sections, get_section_texts,
+                     save_day_sections, save_sections)
+from .constants import EXTRACTOR_VERSION
+from .crawler import fetch_pages, remember_failure
+from .extract import Section, Speech, extract_day_sections, extract_section
+from .progress import count_pages
+
+
+async def day_sections(days: List[Tuple[str, int, str, int]],
+                       client: httpx.AsyncClient,
+                       data: Dict,
+                       conn,
+                       redis_client,
+                       bot) -> Dict[str, List[Section]]:
+    """
+    Обсуждения по дням заседаний (day_url, year, month, day).
+    Уже разобранные дни берутся из Postgres, остальные загружаются,
+    разбираются один раз и сохраняются. Недоступных дней нет в ответе.
+    Дни, которые не удалось сохранить, отмечаются как сбой загрузки:
+    год с ними не попадает в текстовый индекс.
+    """
+    stored = await get_day_sections([day[0] for day in days],
+                                    EXTRACTOR_VERSION,
+                                    conn)
+    sections = {
+        day_url: [Section(row['house'], row['title'], row['href'])
+                  for row in rows]
+        for day_url, rows in stored.items()
+    }
+    count_pages(len(sections))
+    missing = [day for day in days if day[0] not in sections]
+    pages = await fetch_pages(client,
+                              [day[0] for day in missing],
+                              data,
+                              conn,
+                              redis_client,
+                              bot)
+    extracted = []
+    for (day_url, year, month, day), page in zip(missing, pages):
+        if page is None:
+            continue
+        sections[day_url] = extract_day_sections(page)
+        extracted.append((day_url, year, month, day, sections[day_url]))
+    if not await save_day_sections(extracted, EXTRACTOR_VERSION, conn):
+        for day_url, *_ in extracted:
+            remember_failure(day_url)
+    return sections
+
+
+async def section_records(urls: List[str],
+                          client: httpx.AsyncClient,
+                          data: Dict,
+                          conn,
+                          redis_client,
+                          bot,
+                          with_speeches: bool = False
+                          ) -> Dict[str, Tuple[str, List[Speech]]]:
+    """
+    Текст и выступления обсуждений по их url.
+    Выступления из Postgres читаются только при with_speeches.
+    Ответ проиндексирован url без якоря; недоступных страниц в нём нет.
+    Несохранённые обсуждения отмечаются как сбой, как в day_sections.
+    """
+    urls = list(dict.fromkeys(url.split('#')[0] for url in urls))
+    texts = await get_section_texts(urls, EXTRACTOR_VERSION, conn)
+    speeches = (await get_contributions(list(texts), conn)
+                if with_speeches else {})
+    records = {
+        url: (text, [Speech(row['speaker'], row['text'])
+                     for row in speeches.get(url, [])])
+        for url, text in texts.items()
+    }
+    count_pages(len(records))
+    missing = [url for url in urls if url not in records]
+    pages = await fetch_pages(client,
+                              missing,
+                              data,
+                              conn,
+                              redis_client,
+                              bot)
+    extracted = []
+    for url, page in zip(missing, pages):
+        if page is None:
+            continue
+        records[url] = extract_section(page)
+        extracted.append((url, *records[url]))
+    if not await save_sections(extracted, EXTRACTOR_VERSION, conn):
+        for url, *_ in extracted:
+            remember_failure(url)
+    return records
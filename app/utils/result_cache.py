@@ -0,0 +1,48 @@
+import hashlib
+import json
+from typing import Dict
+
+from ..db.db import get_query_results, save_query_result
+from .constants import EXTRACTOR_VERSION
+from .matching import Found, query_keywords
+
+QUERY_FIELDS = ('person_info', 'writings', 'way', 'keyword')
+
+
+def query_fingerprint(data: Dict, keyword: str) -> str:
+    """Отпечаток запроса по одному слову; годы хранятся отдельно."""
+    query = {field: data.get(field) for field in QUERY_FIELDS}
+    query['keyword'] = keyword
+    return hashlib.sha1(
+        json.dumps(query, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+async def cached_years(data: Dict, conn) -> Dict[int, Found]:
+    """
+    Годы, уже посчитанные для всех слов запроса: {год: найденное}.
+    Результаты хранятся по каждому слову отдельно, поэтому слово
+    переиспользуется и в других наборах слов. Результаты другой
+    версии экстрактора не используются.
+    """
+    keywords = query_keywords(data)
+    by_keyword = {}
+    for keyword in keywords:
+        by_keyword[keyword] = await get_query_results(
+            query_fingerprint(data, keyword),
+            EXTRACTOR_VERSION,
+            conn
+        )
+    years = set.intersection(*(set(rows) for rows in by_keyword.values()))
+    return {year: {keyword: json.loads(by_keyword[keyword][year])
+                   for keyword in keywords}
+            for year in sorted(years)}
+
+
+async def remember_year(data: Dict, year: int, found: Found, conn):
+    for keyword, blocks in found.items():
+        await save_query_result(query_fingerprint(data, keyword),
+                                year,
+                                json.dumps(blocks, ensure_ascii=False),
+                                EXTRACTOR_VERSION,
+                                conn)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import uuid
+import weakref
+from typing import Awaitable, Callable, Dict
+
+from .constants import (FETCH_LOCK_KEY, FETCH_LOCK_POLL_MAX,
+                        FETCH_LOCK_POLL_MIN, FETCH_LOCK_TTL)
+
+# Снимает блокировку, только если она ещё наша: по истечении TTL
+# её мог взять другой воркер.
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Задачи привязаны к циклу событий, поэтому загрузки в полёте
+# хранятся отдельно для каждого цикла.
+_flights: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def lock_key(key: str) -> str:
+    return f'{FETCH_LOCK_KEY}:{key}'
+
+
+async def _locked_load(key: str,
+                       redis_client,
+                       load: Callable[[], Awaitable]):
+    """
+    Выполняет загрузку под блокировкой Redis. Пока блокировка занята
+    другим воркером, ждёт её снятия, опрашивая с растущим интервалом.
+    load сам должен сначала проверять кэш: после ожидания результат
+    обычно уже там.
+    """
+    token = uuid.uuid4().hex
+    delay = FETCH_LOCK_POLL_MIN
+    waited = False
+    while not await redis_client.set(lock_key(key),
+                                     token,
+                                     nx=True,
+                                     ex=FETCH_LOCK_TTL):
+        if not waited:
+            logging.info(f'{key} уже загружается другим воркером, ждём')
+            waited = True
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, FETCH_LOCK_POLL_MAX)
+    try:
+        return await load()
+    finally:
+        await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key(key), token)
+
+
+async def single_flight(key: str,
+                        redis_client,
+                        load: Callable[[], Awaitable]):
+    """
+    Не даёт загружать одно и то же несколько раз одновременно:
+    в процессе повторные вызовы ждут уже идущую загрузку,
+    между воркерами загрузку сериализует блокировка Redis.
+    """
+    flights = _flights.setdefault(asyncio.get_running_loop(), {})
+    while (task := flights.get(key)) is not None and not task.done():
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            # Отменили вызов, начавший загрузку, — пробуем сами.
+    task = asyncio.ensure_future(_locked_load(key, redis_client, load))
+    flights[key] = task
+
+    def forget(done: asyncio.Future):
+        if flights.get(key) is done:
+            del flights[key]
+
+    task.add_done_callback(forget)
+    return await task
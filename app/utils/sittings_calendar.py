@@ -0,0 +1,120 @@
+import calendar
+import json
+import logging
+import re
+from typing import Dict, List, Tuple
+
+import httpx
+
+from ..db.db import get_sitting_dates, save_sitting_dates
+from .constants import (BASE_NO_PESON_URL, MONTHS, SITTING_CALENDAR_KEY,
+                        SITTING_LINK_PATTERN)
+from .crawler import fetch_page, fetch_pages
+from .extract import extract_links
+
+
+def sort_dates(dates) -> List[Tuple[str, int]]:
+    return sorted(set(dates),
+                  key=lambda date: (MONTHS.index(date[0]), date[1]))
+
+
+def all_calendar_dates(year: int) -> List[Tuple[str, int]]:
+    """Все существующие даты года — запасной вариант без индекса заседаний."""
+    return [(month, day)
+            for number, month in enumerate(MONTHS, start=1)
+            for day in range(1, calendar.monthrange(year, number)[1] + 1)]
+
+
+def parse_sitting_links(page: str, year: int):
+    """Находит на странице индекса ссылки на дни и месяцы заседаний."""
+    days, months = set(), set()
+    for link in extract_links(page):
+        match = re.search(SITTING_LINK_PATTERN, link)
+        if not match or int(match.group(1)) != year:
+            continue
+        month = match.group(2)
+        if month not in MONTHS:
+            continue
+        if match.group(3):
+            days.add((month, int(match.group(3))))
+        else:
+            months.add(month)
+    return days, months
+
+
+async def discover_sitting_dates(year: int,
+                                 client: httpx.AsyncClient,
+                                 data: Dict,
+                                 conn,
+                                 redis_client,
+                                 bot) -> List[Tuple[str, int]] | None:
+    """
+    Читает индекс заседаний года, а при необходимости — индексы месяцев.
+    Возвращает None, если индекс года или какого-то из месяцев
+    недоступен или в нём нет ни одного дня: неполный календарь
+    не сохраняется.
+    """
+    page = await fetch_page(client,
+                            f'{BASE_NO_PESON_URL}/{year}',
+                            data,
+                            conn,
+                            redis_client,
+                            bot)
+    if page is None:
+        return None
+    days, months = parse_sitting_links(page, year)
+    months -= {month for month, _ in days}
+    if months:
+        ordered_months = [month for month in MONTHS if month in months]
+        month_pages = await fetch_pages(
+            client,
+            [f'{BASE_NO_PESON_URL}/{year}/{month}'
+             for month in ordered_months],
+            data,
+            conn,
+            redis_client,
+            bot
+            )
+        for month, month_page in zip(ordered_months, month_pages):
+            if month_page is None:
+                logging.warning(f'Индекс заседаний {year}/{month} '
+                                'недоступен')
+                return None
+            month_days, _ = parse_sitting_links(month_page, year)
+            days |= month_days
+    if not days:
+        return None
+    return sort_dates(days)
+
+
+async def sitting_dates(year: int,
+                        client: httpx.AsyncClient,
+                        data: Dict,
+                        conn,
+                        redis_client,
+                        bot) -> List[Tuple[str, int]]:
+    """
+    Даты заседаний за год: Redis → Postgres → индекс на сайте.
+    Если индекс недоступен, возвращает все существующие даты года.
+    """
+    key = f'{SITTING_CALENDAR_KEY}:{year}'
+    cached = await redis_client.get(key)
+    if cached:
+        return [tuple(date) for date in json.loads(cached)]
+    dates = await get_sitting_dates(year, conn)
+    if dates is None:
+        dates = await discover_sitting_dates(year,
+                                             client,
+                                             data,
+                                             conn,
+                                             redis_client,
+                                             bot)
+        if dates is None:
+            logging.warning(f'Календарь заседаний {year} недоступен, '
+                            'перебираем все даты')
+            return all_calendar_dates(year)
+        await save_sitting_dates(year, dates, conn)
+        logging.info(f'Календарь {year}: {len(dates)} дней заседаний')
+    dates = sort_dates(dates)
+    await redis_client.set(key, json.dumps(dates))
+    return dates
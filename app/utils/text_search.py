@@ -0,0 +1,72 @@
+import logging
+from itertools import groupby
+from typing import AsyncIterator, Dict, List, Tuple
+
+from ..db.db import get_indexed_years, search_section_texts
+from .constants import (EXTRACTOR_VERSION, MAIN_URL, MONTHS, SITTING_HOUSES,
+                        WRITTEN_ANSWERS_HOUSES)
+from .matching import Found, keyword_term, new_found, query_keywords
+from .progress import set_total_years
+
+
+def index_kind(data: Dict) -> str:
+    return 'writings' if 'writings' in data.keys() else 'sittings'
+
+
+def index_houses(data: Dict) -> List[str]:
+    if 'writings' in data.keys():
+        return WRITTEN_ANSWERS_HOUSES
+    return SITTING_HOUSES
+
+
+async def is_range_indexed(data: Dict, conn) -> bool:
+    """
+    Можно ли ответить на поиск в текстах по всем заседаниям из индекса:
+    каждый год периода должен быть полностью разобран.
+    """
+    if 'person_info' in data.keys() or data.get('way') != 'in_texts':
+        return False
+    try:
+        from_year, to_year = int(data['from_date']), int(data['to_date'])
+    except (KeyError, ValueError):
+        return False
+    if from_year > to_year:
+        return False
+    indexed = await get_indexed_years(from_year,
+                                      to_year,
+                                      index_kind(data),
+                                      EXTRACTOR_VERSION,
+                                      conn)
+    return len(indexed) == to_year - from_year + 1
+
+
+async def search_indexed_texts(
+        data: Dict,
+        conn
+        ) -> AsyncIterator[Tuple[int, Found]]:
+    """Отдаёт найденное по текстовому индексу погодно: (год, найденное)."""
+    logging.info(f'Ищем {data['keyword']} по текстовому индексу')
+    from_year, to_year = int(data['from_date']), int(data['to_date'])
+    set_total_years(to_year - from_year + 1)
+    keywords = query_keywords(data)
+    found = {year: new_found(keywords)
+             for year in range(from_year, to_year + 1)}
+    for keyword in keywords:
+        term, whole_word = keyword_term(keyword)
+        rows = await search_section_texts(term,
+                                          whole_word,
+                                          from_year,
+                                          to_year,
+                                          index_houses(data),
+                                          MONTHS,
+                                          MAIN_URL,
+                                          EXTRACTOR_VERSION,
+                                          conn)
+        for year, year_rows in groupby(rows, key=lambda row: row['year']):
+            found[year][keyword] = [
+                [f'{row['year']}.{row['month']}.{row['day']} '
+                 f'{row['title']} – {MAIN_URL}{row['href']}']
+                for row in year_rows
+            ]
+    for year in range(from_year, to_year + 1):
+        yield year, found.pop(year)
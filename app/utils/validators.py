@@ -1,6 +1,7 @@
 import re
 
-from .constants import DATE_RANGE, FINISH_DATE, START_DATE
+from .constants import DATE_RANGE, FINISH_DATE, MAX_KEYWORDS, START_DATE
+from .matching import parse_keywords
 
 
 async def validate_date(from_date: str, to_date: str):
@@ -13,7 +14,19 @@ async def validate_date(from_date: str, to_date: str):
             (from_date == '0' and to_date == '0'))
 
 
-async def validate_no_person_date(from_date: str, to_date: str, person: bool):
+async def validate_no_person_date(from_date: str,
+                                  to_date: str,
+                                  person: bool,
+                                  indexed: bool = False):
+    """
+    Поиск по всем заседаниям ограничен DATE_RANGE годами,
+    если период целиком не покрыт текстовым индексом.
+    """
     return ((from_date.isnumeric() and to_date.isnumeric() and
              from_date != '0' and to_date != '0' and
-             (int(to_date) - int(from_date) <= DATE_RANGE)) or person)
+             (int(to_date) - int(from_date) <= DATE_RANGE or indexed))
+            or person)
+
+
+async def validate_keywords(text: str):
+    return 0 < len(parse_keywords(text)) <= MAX_KEYWORDS
@@ -0,0 +1,89 @@
+"""
+Замер поиска ключевого слова в тексте длинного заседания:
+прежний способ (весь текст в верхнем регистре через += и gc.collect()
+на каждой странице) против построчного поиска app.utils.matching.
+
+python -m benchmarks.long_sitting [--speeches 3000] [--words 120]
+                                  [--heap 200000] [--repeat 20]
+"""
+import argparse
+import gc
+import random
+import time
+from typing import Callable, List
+
+from app.utils.extract import Speech
+from app.utils.matching import keyword_matcher
+
+WORDS = ['the', 'house', 'minister', 'honourable', 'member', 'question',
+         'bill', 'trade', 'peace', 'labour']
+PERSON_ID = 'mr-john-smith'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--speeches', type=int, default=3000,
+                        help='выступлений в заседании')
+    parser.add_argument('--words', type=int, default=120,
+                        help='слов в выступлении')
+    parser.add_argument('--heap', type=int, default=200000,
+                        help='живых объектов в куче, как у воркера')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='страниц на замер')
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+def long_sitting(speeches: int, words: int) -> List[Speech]:
+    return [Speech(f'https://api.parliament.uk/historic-hansard/people/'
+                   f'{PERSON_ID}',
+                   ' '.join(random.choice(WORDS) for _ in range(words)))
+            for _ in range(speeches)]
+
+
+def before(speeches: List[Speech], keyword: str) -> bool:
+    """Прежний разбор: склейка текста в верхнем регистре и сборка мусора."""
+    sitting_text = ''
+    for speech in speeches:
+        if PERSON_ID in speech.speaker:
+            sitting_text += speech.text.upper()
+    found = keyword in sitting_text
+    gc.collect()
+    return found
+
+
+def after(speeches: List[Speech], keyword: str) -> bool:
+    """Текущий разбор: поиск по выступлениям до первого совпадения."""
+    return bool(keyword_matcher((keyword,)).find(
+        speech.text for speech in speeches if PERSON_ID in speech.speaker
+    ))
+
+
+def per_page_ms(search: Callable[[List[Speech], str], bool],
+                speeches: List[Speech],
+                keyword: str,
+                repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        search(speeches, keyword)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    speeches = long_sitting(args.speeches, args.words)
+    heap = [{'x': [i] * 10} for i in range(args.heap)]
+    for label, keyword in (('слово есть', 'MINISTER'),
+                           ('слова нет', 'WAR')):
+        assert before(speeches, keyword) == after(speeches, keyword)
+        print(f'{label}: '
+              f'до {per_page_ms(before, speeches, keyword, args.repeat):.2f}'
+              f' мс, после '
+              f'{per_page_ms(after, speeches, keyword, args.repeat):.2f}'
+              ' мс на страницу')
+    del heap
+
+
+if __name__ == '__main__':
+    main()
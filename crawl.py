@@ -0,0 +1,87 @@
+"""
+Предварительный обход корпуса Hansard 1803–2005 для прогрева кэша.
+
+python crawl.py [--from 1803] [--to 2005] [--sittings | --people]
+                [--anytime] [--restart] [--report]
+"""
+import argparse
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+from app.db.db import close_pool, get_pool, init_db, save_checkpoint
+from app.redis.redis_client import close_redis_clients, get_redis_client
+from app.utils.constants import (FINISH_DATE, PRECRAWL_MAX_REQUESTS,
+                                 PRECRAWL_REQUESTS_PER_SECOND, START_DATE)
+from app.utils.crawler import create_client
+from app.utils.precrawl import (PEOPLE_CHECKPOINT, crawl_people,
+                                crawl_sittings, log_coverage,
+                                sittings_checkpoint)
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logging.getLogger('httpx').disabled = True
+logging.getLogger('httpcore').disabled = True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--from', dest='from_year', type=int,
+                        default=START_DATE)
+    parser.add_argument('--to', dest='to_year', type=int,
+                        default=FINISH_DATE)
+    only = parser.add_mutually_exclusive_group()
+    only.add_argument('--sittings', action='store_true',
+                      help='обходить только заседания')
+    only.add_argument('--people', action='store_true',
+                      help='обходить только персон')
+    parser.add_argument('--anytime', action='store_true',
+                        help='не ждать ночного окна обхода')
+    parser.add_argument('--restart', action='store_true',
+                        help='начать обход заново, сбросив чекпоинты')
+    parser.add_argument('--report', action='store_true',
+                        help='только показать покрытие по годам')
+    return parser.parse_args()
+
+
+async def main(args) -> None:
+    await init_db()
+    conn = get_pool()
+    redis_client = get_redis_client()
+    try:
+        if args.report:
+            await log_coverage(args.from_year, args.to_year, conn)
+            return
+        if args.restart:
+            await save_checkpoint(sittings_checkpoint(args.from_year,
+                                                      args.to_year),
+                                  None,
+                                  conn)
+            await save_checkpoint(PEOPLE_CHECKPOINT, None, conn)
+        async with create_client(
+                max_requests=PRECRAWL_MAX_REQUESTS,
+                max_requests_per_host=PRECRAWL_MAX_REQUESTS,
+                requests_per_second=PRECRAWL_REQUESTS_PER_SECOND
+                ) as client:
+            if not args.people:
+                await crawl_sittings(args.from_year,
+                                     args.to_year,
+                                     client,
+                                     conn,
+                                     redis_client,
+                                     args.anytime)
+            if not args.sittings:
+                await crawl_people(client, conn, redis_client, args.anytime)
+        await log_coverage(args.from_year, args.to_year, conn)
+    finally:
+        await close_pool()
+        await close_redis_clients()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
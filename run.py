@@ -7,8 +7,15 @@ from os import getenv
 from aiogram import Bot, Dispatcher
 from dotenv import load_dotenv
 
-from app.db.db import init_db
+from app.db.constants import POOL_HEALTH_CHECK_INTERVAL
+from app.db.db import check_pool, close_pool, get_pool, init_db
 from app.handlers import router
+from app.redis.redis_client import close_redis_clients, get_redis_client
+from app.tasks.tasks import dispatch_jobs
+from app.utils.constants import MP_DIRECTORY_REFRESH_HOURS
+from app.utils.crawler import create_client
+from app.utils.local_cache import page_cache
+from app.utils.mp_directory import refresh_mp_directory
 
 
 load_dotenv()
@@ -46,17 +53,46 @@ async def cleanup_results_folder():
         await asyncio.sleep(24 * 60 * 60)
 
 
+async def check_db_pool():
+    """Фоновая задача: периодически проверяет пул соединений с БД."""
+    while True:
+        await asyncio.sleep(POOL_HEALTH_CHECK_INTERVAL)
+        if not await check_pool():
+            logging.error(f'[{datetime.now()}] Пул соединений с БД '
+                          'не отвечает')
+
+
+async def refresh_mp_directory_periodically():
+    """Фоновая задача: обновляет справочник персон."""
+    while True:
+        try:
+            async with create_client() as client:
+                await refresh_mp_directory(client,
+                                           get_pool(),
+                                           get_redis_client())
+        except Exception as e:
+            logging.error(f'[{datetime.now()}] Ошибка при обновлении '
+                          f'справочника персон: {e}')
+        await asyncio.sleep(MP_DIRECTORY_REFRESH_HOURS * 60 * 60)
+
+
 async def main() -> None:
     await init_db()
     bot = Bot(token=TOKEN)
     logging.info(f'[{datetime.now()}] Бот запущен')
 
     asyncio.create_task(cleanup_results_folder())
+    asyncio.create_task(check_db_pool())
+    asyncio.create_task(dispatch_jobs())
+    asyncio.create_task(refresh_mp_directory_periodically())
 
     try:
         await dp.start_polling(bot)
     finally:
         await bot.session.close()
+        await close_pool()
+        await close_redis_clients()
+        logging.info(f'Кэш страниц в памяти: {page_cache.stats()}')
         logging.info(f'[{datetime.now()}] Бот остановлен')
 
 
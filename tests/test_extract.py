@@ -0,0 +1,121 @@
+"""
+Сверка извлечения данных через XPath lxml с прежним разбором
+BeautifulSoup на сохранённых страницах Hansard.
+"""
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.utils.constants import SITTING_HOUSES, WRITTEN_ANSWERS_HOUSES
+from app.utils.extract import (extract_day_sections, extract_links,
+                               extract_people, extract_person_contributions,
+                               extract_person_years, extract_section)
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+# section.html начинается с объявления XML, как страницы Hansard.
+pytestmark = pytest.mark.filterwarnings(
+    'ignore::bs4.XMLParsedAsHTMLWarning'
+)
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding='utf-8')
+
+
+def bs_day_sections(page: str):
+    soup = BeautifulSoup(page, 'lxml')
+    sections = []
+    for house in SITTING_HOUSES + WRITTEN_ANSWERS_HOUSES:
+        house_tag = soup.find('h3', {'id': house})
+        if not house_tag:
+            continue
+        list_tag = house_tag.find_next_sibling()
+        if list_tag is None:
+            continue
+        for link in list_tag.find_all('a', href=True):
+            sections.append((house, link.text, link['href']))
+    return sections
+
+
+def bs_section(page: str):
+    soup = BeautifulSoup(page, 'lxml')
+    text = '\n'.join(
+        tag.get_text(' ', strip=True)
+        for tag in soup.find_all('div',
+                                 {'class': 'hentry member_contribution'})
+    )
+    speeches = [(tag['cite'], tag.get_text(' ', strip=True))
+                for tag in soup.find_all('blockquote', cite=True)]
+    return text, speeches
+
+
+def bs_people(page: str):
+    soup = BeautifulSoup(page, 'lxml')
+    return [(person.find('a').text,
+             person.find('a')['href'],
+             person.find('span').text)
+            for person in soup.find_all('li', {'class': 'person'})]
+
+
+def bs_person_years(page: str):
+    soup = BeautifulSoup(page, 'lxml')
+    return [year.find('a')['href']
+            for year in soup.find_all('span', {'class': 'speeches-by-year'})]
+
+
+def bs_person_contributions(page: str):
+    soup = BeautifulSoup(page, 'lxml')
+    contributions = soup.find_all('p', {'class': 'person-contribution'})
+    return [(contribution.find('span', {'class': 'date'}).text,
+             contribution.find('a').text,
+             contribution.find('a')['href'])
+            for contribution in contributions]
+
+
+def bs_links(page: str):
+    soup = BeautifulSoup(page, 'lxml')
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+
+def test_day_sections():
+    page = fixture('day.html')
+    sections = extract_day_sections(page)
+    assert sections
+    assert [tuple(section) for section in sections] == bs_day_sections(page)
+
+
+def test_section():
+    page = fixture('section.html')
+    text, speeches = extract_section(page)
+    assert text and speeches
+    assert (text, [tuple(speech) for speech in speeches]) == bs_section(page)
+
+
+def test_people():
+    page = fixture('people.html')
+    people = extract_people(page)
+    assert people
+    assert [tuple(person) for person in people] == bs_people(page)
+
+
+def test_person_years():
+    page = fixture('person.html')
+    years = extract_person_years(page)
+    assert years
+    assert years == bs_person_years(page)
+
+
+def test_person_contributions():
+    page = fixture('person_year.html')
+    contributions = extract_person_contributions(page)
+    assert contributions
+    assert ([tuple(contribution) for contribution in contributions] ==
+            bs_person_contributions(page))
+
+
+@pytest.mark.parametrize('name', ['day.html', 'section.html', 'people.html',
+                                  'person.html', 'person_year.html'])
+def test_links(name):
+    page = fixture(name)
+    assert extract_links(page) == bs_links(page)